@@ -1,10 +1,21 @@
+import asyncio
+import importlib.util
+import itertools
 import os
+import random
+import string
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Optional
 from dotenv import load_dotenv
+from groq import RateLimitError
 from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, conlist, field_validator
+from pydantic_core import from_json
+import httpx
 import requests
 from datetime import datetime
 
@@ -74,283 +85,860 @@ class MarketAnalysis(BaseModel):
             return v.get('description', str(v))
         return str(v)
 
+_CROP_PROMPT = (
+    "As an agricultural expert specializing in Indian farming, provide ONE SINGLE crop recommendation for:\n"
+    "Location: {location}\n"
+    "Soil Type: {soil_type}\n" 
+    "Season: {season}\n"
+    "Farm Size: {farm_size}\n\n"
+    "Consider Indian agricultural conditions, monsoon patterns, and local market demands.\n"
+    "Return ONLY ONE crop recommendation in this EXACT JSON format:\n\n"
+    "{{\n"
+    '  "crop_name": "Name of the SINGLE most suitable crop",\n'
+    '  "planting_season": "Best time to plant this crop with specific months",\n'
+    '  "care_instructions": ["Detailed instruction 1", "Detailed instruction 2", "Detailed instruction 3"],\n'
+    '  "expected_yield": "Realistic yield per acre as a simple string",\n'
+    '  "market_value": "Current market price and demand as a simple string"\n'
+    "}}\n\n"
+    "Market value should be a simple string, not an object.\n"
+    "Your response:"
+)
+
+_CROP_BATCH_PROMPT = (
+    "As an agricultural expert specializing in Indian farming, provide ONE SINGLE crop recommendation for each farm below:\n"
+    "{rows}\n\n"
+    "Consider Indian agricultural conditions, monsoon patterns, and local market demands.\n"
+    "Return a JSON object whose \"recommendations\" array holds exactly {count} recommendations, one per farm and in the same order, in this EXACT format:\n\n"
+    "{{\n"
+    '  "recommendations": [\n'
+    "    {{\n"
+    '      "crop_name": "Name of the SINGLE most suitable crop",\n'
+    '      "planting_season": "Best time to plant this crop with specific months",\n'
+    '      "care_instructions": ["Detailed instruction 1", "Detailed instruction 2", "Detailed instruction 3"],\n'
+    '      "expected_yield": "Realistic yield per acre as a simple string",\n'
+    '      "market_value": "Current market price and demand as a simple string"\n'
+    "    }}\n"
+    "  ]\n"
+    "}}\n\n"
+    "Market value should be a simple string, not an object.\n"
+    "Your response:"
+)
+
+_DISEASE_PROMPT = (
+    "As a plant pathology expert familiar with Indian crop diseases, analyze this case:\n"
+    "Crop: {crop_type}\n"
+    "Symptoms: {symptoms}\n"
+    "Region: {region}\n\n"
+    "Provide detailed analysis in JSON format:\n"
+    '{{\n'
+    '  "disease_name": "Most likely disease based on symptoms",\n'
+    '  "severity": "Low/Medium/High",\n'
+    '  "symptoms": ["Key symptom 1", "Key symptom 2", "Key symptom 3"],\n'
+    '  "treatment": ["Treatment step 1", "Treatment step 2", "Treatment step 3"],\n'
+    '  "prevention": ["Prevention measure 1", "Prevention measure 2", "Prevention measure 3"]\n'
+    '}}\n\n'
+    "Focus on treatments available in Indian agricultural context.\n"
+    "Your response:"
+)
+
+_SOIL_PROMPT = (
+    "As a soil scientist expert in Indian agricultural conditions, analyze these soil parameters:\n"
+    "pH Level: {ph_level}\n"
+    "Organic Matter: {organic_matter}\n"
+    "Drainage: {drainage}\n"
+    "Region: {region}\n\n"
+    "Provide comprehensive soil analysis in JSON format:\n"
+    '{{\n'
+    '  "soil_type": "Soil classification based on given parameters",\n'
+    '  "ph_level": "Analysis of pH level and its implications",\n'
+    '  "nutrient_status": ["Nutrient analysis 1", "Nutrient analysis 2", "Nutrient analysis 3"],\n'
+    '  "recommendations": ["Improvement suggestion 1", "Improvement suggestion 2", "Improvement suggestion 3"],\n'
+    '  "suitable_crops": ["Crop 1", "Crop 2", "Crop 3", "Crop 4"]\n'
+    '}}\n\n'
+    "Consider Indian soil types and regional agricultural practices.\n"
+    "Your response:"
+)
+
+_WEATHER_PROMPT = (
+    "As a meteorological agriculture advisor for Indian farming, provide weather-based guidance:\n"
+    "Location: {location}\n"
+    "Current Weather: {current_weather}\n"
+    "Crop Stage: {crop_stage}\n\n"
+    "Provide weather advisory in JSON format:\n"
+    '{{\n'
+    '  "current_conditions": "Summary of current weather conditions",\n'
+    '  "farming_impact": "How current weather affects farming activities",\n'
+    '  "recommendations": ["Weather-based advice 1", "Weather-based advice 2", "Weather-based advice 3"],\n'
+    '  "alerts": ["Important alert 1", "Important alert 2"]\n'
+    '}}\n\n'
+    "Consider Indian monsoon patterns and regional weather impacts.\n"
+    "Your response:"
+)
+
+_MARKET_PROMPT = (
+    "As a market analyst specializing in Indian agricultural markets, analyze:\n"
+    "Crop: {crop_name}\n"
+    "Location: {location}\n"
+    "Quantity: {quantity}\n\n"
+    "Provide market analysis in JSON format:\n"
+    '{{\n'
+    '  "crop_name": "Crop being analyzed",\n'
+    '  "current_price": "Current market price range in Indian context",\n'
+    '  "price_trend": "Price trend analysis and future predictions",\n'
+    '  "demand_status": "Current market demand status",\n'
+    '  "selling_tips": ["Selling tip 1", "Selling tip 2", "Selling tip 3"]\n'
+    '}}\n\n'
+    "Consider Indian mandi prices and regional market variations.\n"
+    "Your response:"
+)
+
+def _as_text(value) -> str:
+    """Coerce a JSON value to text, unwrapping schema-style {"description": ...} echoes"""
+    if isinstance(value, dict):
+        return value.get('description', str(value))
+    return str(value)
+
+def _as_text_list(value) -> List[str]:
+    if not isinstance(value, list):
+        raise TypeError(f"Expected a list, got {type(value).__name__}")
+    return [_as_text(item) for item in value]
+
+def _compile_parser(model):
+    """Generate a parser that builds `model` straight from a decoded reply.
+
+    The schemas are fixed, so each field is read by name and coerced with a
+    known helper before model_construct, skipping pydantic's generic
+    per-field validator dispatch.
+    """
+    args = ", ".join(
+        f"{name}={'_as_text_list' if field.annotation == List[str] else '_as_text'}(data[{name!r}])"
+        for name, field in model.model_fields.items()
+    )
+    namespace = {"model": model, "_as_text": _as_text, "_as_text_list": _as_text_list}
+    exec(f"def parse(data):\n    return model.model_construct({args})\n", namespace)
+    return namespace["parse"]
+
+# Parsers are generated once here and reused for every response
+_parse_crop = _compile_parser(CropRecommendation)
+_parse_disease = _compile_parser(DiseaseAnalysis)
+_parse_soil = _compile_parser(SoilAnalysis)
+_parse_weather = _compile_parser(WeatherAdvisory)
+_parse_market = _compile_parser(MarketAnalysis)
+
+# Strict validators for the fast path, where the reply is exactly the schema's JSON
+_CROP_ADAPTER = TypeAdapter(CropRecommendation)
+_DISEASE_ADAPTER = TypeAdapter(DiseaseAnalysis)
+_SOIL_ADAPTER = TypeAdapter(SoilAnalysis)
+_WEATHER_ADAPTER = TypeAdapter(WeatherAdvisory)
+_MARKET_ADAPTER = TypeAdapter(MarketAnalysis)
+
+@lru_cache(maxsize=None)
+def _crop_batch_adapter(count: int) -> TypeAdapter:
+    # A batch reply must hold exactly one recommendation per farm
+    return TypeAdapter(conlist(CropRecommendation, min_length=count, max_length=count))
+
+def _compile_template(template: str):
+    """Generate a renderer that fills `template`'s fields by keyword.
+
+    The template is parsed once here, so rendering is a single join over
+    pre-split literal parts instead of str.format re-parsing it on every call.
+    """
+    parts, fields = [], []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        if literal:
+            parts.append(repr(literal))
+        if field is not None:
+            if spec or conversion:
+                raise ValueError(f"Unsupported template field: {field}")
+            parts.append(f"str({field})")
+            if field not in fields:
+                fields.append(field)
+    namespace = {}
+    exec(f"def render(*, {', '.join(fields)}):\n    return ''.join(({', '.join(parts)},))\n", namespace)
+    return namespace["render"]
+
+# Prompts are compiled once here and reused for every request
+_render_crop_prompt = _compile_template(_CROP_PROMPT)
+_render_crop_batch_prompt = _compile_template(_CROP_BATCH_PROMPT)
+_render_disease_prompt = _compile_template(_DISEASE_PROMPT)
+_render_soil_prompt = _compile_template(_SOIL_PROMPT)
+_render_weather_prompt = _compile_template(_WEATHER_PROMPT)
+_render_market_prompt = _compile_template(_MARKET_PROMPT)
+
+def _load_json(content: str):
+    """Parse the JSON payload of an LLM reply, skipping prose or code fences around it"""
+    starts = [idx for idx in (content.find('{'), content.find('[')) if idx != -1]
+    end = max(content.rfind('}'), content.rfind(']'))
+    if not starts or end < min(starts):
+        raise ValueError("No JSON found in response")
+    return from_json(content[min(starts):end + 1])
+
+class _JsonScanner:
+    """Tracks bracket depth over streamed text to spot where the JSON payload ends"""
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text: str) -> bool:
+        """Consume a chunk; returns True once the outermost object/array has closed"""
+        for char in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.started
+            elif char in '{[':
+                self.depth += 1
+                self.started = True
+            elif char in '}]' and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to back off before retrying a failed attempt.
+
+    A rate-limited key is parked in the pool for its Retry-After period instead,
+    so the next attempt can go straight out on another key.
+    """
+    if isinstance(error, RateLimitError):
+        return 0.0
+    # Jitter spreads out retries from concurrent callers that failed together
+    return min(2 ** attempt * 0.1, 5) * random.uniform(0.5, 1.5)
+
+def _retry_after(error: RateLimitError) -> float:
+    """The server's Retry-After on a 429, or one second when it sent none"""
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 1.0
+
+# Generic recommendation returned when the LLM keeps failing, built once at import
+_CROP_FALLBACK = CropRecommendation(
+    crop_name="Wheat",
+    planting_season="Rabi season (November-December) for your region",
+    care_instructions=[
+        "Prepare field with proper ploughing and leveling",
+        "Apply organic manure 15-20 tons per hectare",
+        "Maintain proper irrigation schedule"
+    ],
+    expected_yield="25-30 quintals per hectare",
+    market_value="₹2000-2500 per quintal with good market demand"
+)
+
+def _fallback_crop_recommendation() -> CropRecommendation:
+    # Deep copy so a caller editing care_instructions cannot alter the shared constant
+    return _CROP_FALLBACK.model_copy(deep=True)
+
+def _normalize_crop_reply(data):
+    """Reduce a JSON array reply to its first recommendation with a flat market value"""
+    # Without JSON mode the model may still answer with an array of crops
+    if isinstance(data, list) and len(data) > 0:
+        data = data[0]
+    
+    if isinstance(data, dict) and isinstance(data.get('market_value'), dict):
+        market_info = data['market_value']
+        price = market_info.get('current_price', 'Price varies')
+        demand = market_info.get('demand', 'Good demand')
+        data['market_value'] = f"{price}, {demand}"
+    
+    return data
+
+def _normalize_crop_batch_reply(data):
+    """Unwrap a JSON-mode {"recommendations": [...]} reply and normalize each entry"""
+    if isinstance(data, dict):
+        data = data.get("recommendations")
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of crop recommendations")
+    return [_normalize_crop_reply(item) for item in data]
+
+def _parse_structured(content: str, task: str, adapter: TypeAdapter, parse,
+                      required_fields: tuple, normalize=None):
+    """Validate an LLM reply against its schema and required non-empty fields
+
+    A list result, as from a batch prompt, has the fields checked on every item.
+    """
+    try:
+        # JSON-mode replies usually validate straight from the raw string
+        parsed_result = adapter.validate_json(content)
+    except ValidationError:
+        data = _load_json(content)
+        if normalize is not None:
+            data = normalize(data)
+        parsed_result = parse(data)
+    
+    items = parsed_result if isinstance(parsed_result, list) else (parsed_result,)
+    if not all(getattr(item, field) for item in items for field in required_fields):
+        raise ValueError(f"Invalid {task} format")
+    
+    return parsed_result
+
+# Groq keys are resolved once, right after load_dotenv() populated the environment
+_API_KEYS = {
+    name: os.getenv(env_var_name)
+    for name, env_var_name in {
+        "GROQ1": "GROQ_API_KEY_1",
+        "GROQ2": "GROQ_API_KEY_2",
+        "GROQ3": "GROQ_API_KEY_3",
+        "GROQ4": "GROQ_API_KEY_4"
+    }.items()
+}
+
+# Process-wide connection pool shared by every ChatGroq client so TLS sessions
+# are reused; HTTP/2 multiplexing is enabled when the optional h2 package exists
+_HTTP2 = importlib.util.find_spec("h2") is not None
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=16)
+_HTTP_CLIENT = httpx.Client(http2=_HTTP2, limits=_HTTP_LIMITS)
+
+# Async connections belong to the event loop that opened them, and run_async
+# starts a new loop per call, so async clients are kept per running loop:
+# loop -> (httpx.AsyncClient, {(api_key_name, json_mode): ChatGroq})
+_ASYNC_LLMS = weakref.WeakKeyDictionary()
+
+def _get_async_llm(api_key_name: str, json_mode: bool) -> ChatGroq:
+    """ChatGroq for the running event loop, sharing that loop's connection pool"""
+    loop = asyncio.get_running_loop()
+    entry = _ASYNC_LLMS.get(loop)
+    if entry is None:
+        entry = _ASYNC_LLMS[loop] = (httpx.AsyncClient(http2=_HTTP2, limits=_HTTP_LIMITS), {})
+    client, llms = entry
+    llm = llms.get((api_key_name, json_mode))
+    if llm is None:
+        llm = llms[api_key_name, json_mode] = _new_llm(api_key_name, json_mode, http_async_client=client)
+    return llm
+
+async def _close_async_llms():
+    """Release the running loop's connection pool before the loop goes away"""
+    entry = _ASYNC_LLMS.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        await entry[0].aclose()
+
+async def _run_and_close(coro):
+    """Await coro, then close the async clients opened on this loop"""
+    try:
+        return await coro
+    finally:
+        await _close_async_llms()
+
+def run_async(coro):
+    """Run a GreenCureAI coroutine to completion, on uvloop when it is installed"""
+    if importlib.util.find_spec("uvloop") is not None:
+        import uvloop
+        return uvloop.run(_run_and_close(coro))
+    return asyncio.run(_run_and_close(coro))
+
+class _CircuitOpenError(RuntimeError):
+    """Raised instead of calling Groq while the circuit breaker is open"""
+
+class _CircuitBreaker:
+    """Fail fast once Groq calls have failed fail_max times in a row.
+
+    After reset_timeout seconds a single trial call is let through: success
+    closes the circuit again, another failure keeps it open for a new period.
+    Rate limits are handled by the key pool and do not count as failures.
+    """
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 30):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                raise _CircuitOpenError("Groq is unavailable, circuit breaker is open")
+            # Half-open: restart the window so only this caller makes the trial call
+            self._opened_at = now
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+def _new_llm(api_key_name: str, json_mode: bool, **clients) -> ChatGroq:
+    # Deterministic decoding keeps answers stable enough for the response
+    # cache to hit. JSON mode makes Groq emit a strict JSON object; Groq
+    # does not stream in that mode, so streaming is disabled with it.
+    return ChatGroq(
+        api_key=_API_KEYS[api_key_name],
+        model="llama-3.1-8b-instant",
+        temperature=0.0,
+        model_kwargs={"response_format": {"type": "json_object"}} if json_mode else {},
+        disable_streaming=json_mode,
+        http_client=_HTTP_CLIENT,
+        **clients
+    )
+
+@lru_cache(maxsize=8)
+def _get_llm(api_key_name: str, json_mode: bool) -> ChatGroq:
+    # One sync client per key, shared by every pool and GreenCureAI instance
+    return _new_llm(api_key_name, json_mode)
+
+class _GroqPool:
+    """Round-robin over Groq keys with a per-key token bucket.
+
+    Every request reserves a slot on the key that can serve it soonest; a key
+    that answered 429 is parked until its Retry-After has passed.
+    """
+
+    def __init__(self, api_key_names: tuple, json_mode: bool, requests_per_minute: int):
+        self.api_key_names = api_key_names
+        self.json_mode = json_mode
+        self.llms = [_get_llm(name, json_mode) for name in api_key_names]
+        self._lock = threading.Lock()
+        self._order = itertools.cycle(range(len(self.llms)))
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(requests_per_minute)
+        self._tokens = [self._capacity] * len(self.llms)
+        self._refilled_at = [time.monotonic()] * len(self.llms)
+        self._throttled_until = [0.0] * len(self.llms)
+        self.breaker = _CircuitBreaker()
+
+    def reserve(self):
+        """Claim a request slot; returns (index, llm, seconds to wait before calling it)"""
+        with self._lock:
+            now = time.monotonic()
+            best_index, best_wait = 0, None
+            for _ in range(len(self.llms)):
+                index = next(self._order)
+                self._tokens[index] = min(self._capacity,
+                                          self._tokens[index] + (now - self._refilled_at[index]) * self._rate)
+                self._refilled_at[index] = now
+                wait = max(self._throttled_until[index] - now,
+                           (1 - self._tokens[index]) / self._rate, 0.0)
+                if best_wait is None or wait < best_wait:
+                    best_index, best_wait = index, wait
+                    if wait == 0:
+                        break
+            self._tokens[best_index] -= 1
+            return best_index, self.llms[best_index], best_wait
+
+    def async_llm(self, index: int) -> ChatGroq:
+        """Client for key index bound to the running event loop"""
+        return _get_async_llm(self.api_key_names[index], self.json_mode)
+
+    def mark_throttled(self, index: int, seconds: float):
+        """Keep requests off a key for the given number of seconds"""
+        with self._lock:
+            self._throttled_until[index] = max(self._throttled_until[index],
+                                               time.monotonic() + seconds)
+
+@lru_cache(maxsize=None)
+def _get_pool(api_key_names: tuple, json_mode: bool, requests_per_minute: int) -> _GroqPool:
+    # One pool per key set, so every GreenCureAI instance draws on the same buckets
+    return _GroqPool(api_key_names, json_mode, requests_per_minute)
+
+@lru_cache(maxsize=1)
+def _get_embedder():
+    # Optional dependency, only imported when a semantic cache is requested
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer("all-MiniLM-L6-v2")
+
+class _LRUCache:
+    """Thread-safe mapping that drops the least recently used entry beyond maxsize
+    and treats entries older than ttl seconds as missing"""
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            expires_at, value = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+# Inputs that carry free text; only these are embedded by the semantic cache
+_FREE_TEXT_FIELDS = ("location", "symptoms", "region", "current_weather")
+
+class _SemanticCache:
+    """Reuse an earlier answer when a query's free-text inputs embed close to a cached one.
+
+    Entries are partitioned by the task and every categorical input (soil type,
+    season, crop, pH, ...), which must match exactly; only the free-text fields
+    are embedded with a small local sentence-transformers model and compared by
+    cosine similarity within a partition. A brute-force inner product over
+    normalized vectors is plenty for the maxsize entries kept per partition;
+    the oldest are dropped beyond that.
+    """
+
+    def __init__(self, threshold: float, maxsize: int):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._model = _get_embedder()
+        self._lock = threading.Lock()
+        self._entries = {}  # (task, *exact inputs) -> (vector matrix, results)
+
+    @staticmethod
+    def _partition(task: str, inputs: dict) -> tuple:
+        return (task, *(value for name, value in inputs.items() if name not in _FREE_TEXT_FIELDS))
+
+    def lookup(self, task: str, inputs: dict):
+        """Return (closest cached result or None, the embedding of the free-text inputs)"""
+        text = " | ".join(str(value) for name, value in inputs.items() if name in _FREE_TEXT_FIELDS)
+        vector = self._model.encode(text, normalize_embeddings=True)
+        vectors, results = self._entries.get(self._partition(task, inputs), (None, []))
+        if results:
+            scores = vectors @ vector
+            best = int(scores.argmax())
+            if scores[best] >= self.threshold:
+                return results[best], vector
+        return None, vector
+
+    def add(self, task: str, inputs: dict, vector, result):
+        import numpy as np
+        partition = self._partition(task, inputs)
+        with self._lock:
+            vectors, results = self._entries.get(partition, (None, []))
+            vectors = vector[None, :] if vectors is None else np.vstack([vectors, vector])
+            results = results + [result]
+            self._entries[partition] = (vectors[-self.maxsize:], results[-self.maxsize:])
+
 class GreenCureAI:
-    def __init__(self, api_key_name=None):
-        api_key_mapping = {
-            "GROQ1": "GROQ_API_KEY_1",
-            "GROQ2": "GROQ_API_KEY_2", 
-            "GROQ3": "GROQ_API_KEY_3",
-            "GROQ4": "GROQ_API_KEY_4"
-        }
-        
-        api_key_value = None
-        if api_key_name and api_key_name in api_key_mapping:
-            env_var_name = api_key_mapping[api_key_name]
-            api_key_value = os.getenv(env_var_name)
-        
-        if not api_key_value:
-            raise ValueError(f"API key not found for {api_key_name}")
-            
-        self.llm = ChatGroq(
-            api_key=api_key_value,
-            model="llama-3.1-8b-instant",
-            temperature=0.7
-        )
+    def __init__(self, api_key_name=None, json_mode=True, requests_per_minute=30,
+                 semantic_threshold=None, cache_size=1024, cache_ttl=3600):
+        # A named key pins the instance to it; otherwise calls rotate over every configured key
+        if api_key_name is None:
+            api_key_names = tuple(name for name, value in _API_KEYS.items() if value)
+            if not api_key_names:
+                raise ValueError("No Groq API keys configured")
+        else:
+            if not _API_KEYS.get(api_key_name):
+                raise ValueError(f"API key not found for {api_key_name}")
+            api_key_names = (api_key_name,)
+
+        self._pool = _get_pool(api_key_names, json_mode, requests_per_minute)
+        # Exact-match memo of parsed responses, keyed on (task, *inputs). Bounded and
+        # expiring after cache_ttl seconds (None keeps entries until evicted), since one
+        # instance can be shared by every session of a long-lived server
+        self._cache = _LRUCache(cache_size, cache_ttl)
+        # Optional second tier matching near-duplicate inputs, e.g. 0.95
+        self._semantic_cache = (_SemanticCache(semantic_threshold, cache_size)
+                                if semantic_threshold is not None else None)
+
+    def _complete(self, prompt_text: str) -> str:
+        """Stream a completion, stopping as soon as its JSON payload is closed"""
+        self._pool.breaker.before_call()
+        index, llm, wait = self._pool.reserve()
+        if wait:
+            time.sleep(wait)
+        chunks = []
+        scanner = _JsonScanner()
+        stream = llm.stream(prompt_text)
+        try:
+            for chunk in stream:
+                chunks.append(chunk.content)
+                if scanner.feed(chunk.content):
+                    break
+        except RateLimitError as e:
+            self._pool.mark_throttled(index, _retry_after(e))
+            raise
+        except Exception:
+            self._pool.breaker.record_failure()
+            raise
+        finally:
+            stream.close()
+        self._pool.breaker.record_success()
+        return "".join(chunks)
+
+    async def _acomplete(self, prompt_text: str) -> str:
+        """Async variant of _complete"""
+        self._pool.breaker.before_call()
+        index, _, wait = self._pool.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        llm = self._pool.async_llm(index)
+        chunks = []
+        scanner = _JsonScanner()
+        stream = llm.astream(prompt_text)
+        try:
+            async for chunk in stream:
+                chunks.append(chunk.content)
+                if scanner.feed(chunk.content):
+                    break
+        except RateLimitError as e:
+            self._pool.mark_throttled(index, _retry_after(e))
+            raise
+        except Exception:
+            self._pool.breaker.record_failure()
+            raise
+        finally:
+            await stream.aclose()
+        self._pool.breaker.record_success()
+        return "".join(chunks)
+
+    def _invoke_structured(self, task: str, render, inputs: dict,
+                           adapter: TypeAdapter, parse, required_fields: tuple,
+                           fallback=None, normalize=None, max_attempts: int = 3):
+        """Shared prompt -> completion -> parse -> validate retry loop"""
+        key = (task, *inputs.values())
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        vector = None
+        if self._semantic_cache is not None:
+            result, vector = self._semantic_cache.lookup(task, inputs)
+            if result is not None:
+                self._cache[key] = result
+                return result
+
+        prompt_text = render(**inputs)
+        for attempt in range(max_attempts):
+            try:
+                result = _parse_structured(self._complete(prompt_text), task, adapter, parse,
+                                           required_fields, normalize)
+                self._cache[key] = result
+                if vector is not None:
+                    self._semantic_cache.add(task, inputs, vector, result)
+                return result
+
+            except Exception as e:
+                if attempt == max_attempts - 1 or isinstance(e, _CircuitOpenError):
+                    if fallback is not None:
+                        return fallback()
+                    raise RuntimeError(f"Failed to generate {task} after {attempt + 1} attempts: {str(e)}")
+                time.sleep(_retry_delay(e, attempt))
+
+    async def _ainvoke_structured(self, task: str, render, inputs: dict,
+                                  adapter: TypeAdapter, parse, required_fields: tuple,
+                                  fallback=None, normalize=None, max_attempts: int = 3):
+        """Async variant of _invoke_structured"""
+        key = (task, *inputs.values())
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        vector = None
+        if self._semantic_cache is not None:
+            result, vector = await asyncio.to_thread(self._semantic_cache.lookup, task, inputs)
+            if result is not None:
+                self._cache[key] = result
+                return result
+
+        prompt_text = render(**inputs)
+        for attempt in range(max_attempts):
+            try:
+                result = _parse_structured(await self._acomplete(prompt_text), task, adapter, parse,
+                                           required_fields, normalize)
+                self._cache[key] = result
+                if vector is not None:
+                    self._semantic_cache.add(task, inputs, vector, result)
+                return result
+
+            except Exception as e:
+                if attempt == max_attempts - 1 or isinstance(e, _CircuitOpenError):
+                    if fallback is not None:
+                        return fallback()
+                    raise RuntimeError(f"Failed to generate {task} after {attempt + 1} attempts: {str(e)}")
+                await asyncio.sleep(_retry_delay(e, attempt))
 
     def get_crop_recommendation(self, location: str, soil_type: str, 
                            season: str, farm_size: str) -> CropRecommendation:
         """Generate crop recommendations based on location and conditions"""
-        parser = PydanticOutputParser(pydantic_object=CropRecommendation)
-        
-        prompt = PromptTemplate(
-            template=(
-                "As an agricultural expert specializing in Indian farming, provide ONE SINGLE crop recommendation for:\n"
-                "Location: {location}\n"
-                "Soil Type: {soil_type}\n" 
-                "Season: {season}\n"
-                "Farm Size: {farm_size}\n\n"
-                "Consider Indian agricultural conditions, monsoon patterns, and local market demands.\n"
-                "Return ONLY ONE crop recommendation in this EXACT JSON format:\n\n"
-                "{{\n"
-                '  "crop_name": "Name of the SINGLE most suitable crop",\n'
-                '  "planting_season": "Best time to plant this crop with specific months",\n'
-                '  "care_instructions": ["Detailed instruction 1", "Detailed instruction 2", "Detailed instruction 3"],\n'
-                '  "expected_yield": "Realistic yield per acre as a simple string",\n'
-                '  "market_value": "Current market price and demand as a simple string"\n'
-                "}}\n\n"
-                "IMPORTANT: Return only ONE crop, not a list. Market value should be a simple string, not an object.\n"
-                "Focus on the MOST suitable crop for the given conditions.\n"
-                "{format_instructions}"
-            ),
-            input_variables=["location", "soil_type", "season", "farm_size"],
-            partial_variables={"format_instructions": parser.get_format_instructions()}
+        return self._invoke_structured(
+            "crop recommendation", _render_crop_prompt,
+            dict(location=location, soil_type=soil_type,
+                 season=season, farm_size=farm_size),
+            _CROP_ADAPTER, _parse_crop, ("crop_name", "care_instructions"),
+            fallback=_fallback_crop_recommendation, normalize=_normalize_crop_reply
         )
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                response = self.llm.invoke(prompt.format(
-                    location=location, soil_type=soil_type, 
-                    season=season, farm_size=farm_size
-                ))
-                
-                content = response.content.strip()
-                
-                if content.startswith('['):
-                    import json
-                    try:
-                        json_array = json.loads(content)
-                        if isinstance(json_array, list) and len(json_array) > 0:
-                            first_recommendation = json_array[0]
-                            
-                            if isinstance(first_recommendation.get('market_value'), dict):
-                                market_info = first_recommendation['market_value']
-                                price = market_info.get('current_price', 'Price varies')
-                                demand = market_info.get('demand', 'Good demand')
-                                first_recommendation['market_value'] = f"{price}, {demand}"
-                            
-                            content = json.dumps(first_recommendation)
-                    except json.JSONDecodeError:
-                        pass
-                
-                parsed_result = parser.parse(content)
-                
-                if not parsed_result.crop_name or not parsed_result.care_instructions:
-                    raise ValueError("Invalid crop recommendation format")
-                
-                return parsed_result
-                
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    return CropRecommendation(
-                        crop_name="Wheat",
-                        planting_season="Rabi season (November-December) for your region",
-                        care_instructions=[
-                            "Prepare field with proper ploughing and leveling",
-                            "Apply organic manure 15-20 tons per hectare",
-                            "Maintain proper irrigation schedule"
-                        ],
-                        expected_yield="25-30 quintals per hectare",
-                        market_value="₹2000-2500 per quintal with good market demand"
-                    )
+
+    async def a_get_crop_recommendation(self, location: str, soil_type: str,
+                                        season: str, farm_size: str) -> CropRecommendation:
+        """Async variant of get_crop_recommendation"""
+        return await self._ainvoke_structured(
+            "crop recommendation", _render_crop_prompt,
+            dict(location=location, soil_type=soil_type,
+                 season=season, farm_size=farm_size),
+            _CROP_ADAPTER, _parse_crop, ("crop_name", "care_instructions"),
+            fallback=_fallback_crop_recommendation, normalize=_normalize_crop_reply
+        )
+
+    async def a_batch_crop_recommendations(self, items: List[dict],
+                                           max_concurrency: int = 16) -> list:
+        """Fan out crop recommendations for many farms concurrently.
+
+        Each item holds the keyword arguments of get_crop_recommendation. Results
+        keep the input order; a failed item yields its exception instead of a
+        recommendation. max_concurrency caps in-flight requests to stay under
+        the Groq rate limit.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def recommend(item):
+            async with semaphore:
+                return await self.a_get_crop_recommendation(**item)
+
+        return await asyncio.gather(*(recommend(item) for item in items),
+                                    return_exceptions=True)
+
+    def batch_crop_recommendations(self, rows: List[dict],
+                                   k: int = 8) -> List[CropRecommendation]:
+        """Recommend crops for many farms, packing k farms into each prompt.
+
+        Each row holds the keyword arguments of get_crop_recommendation. A larger
+        k amortizes more per-call overhead, but the gain diminishes beyond
+        roughly 8-16 rows as the longer response starts to dominate latency.
+        """
+        def cache_key(row):
+            return ("crop recommendation", row["location"], row["soil_type"], row["season"], row["farm_size"])
+
+        # Dicts keep one row per distinct key so duplicates share a single answer;
+        # hits are taken up front so later evictions from the LRU cannot lose them
+        found, pending = {}, {}
+        for row in rows:
+            key = cache_key(row)
+            if key in found or key in pending:
                 continue
+            cached = self._cache.get(key)
+            if cached is None:
+                pending[key] = row
+            else:
+                found[key] = cached
+        pending = list(pending.values())
+        for start in range(0, len(pending), k):
+            chunk = pending[start:start + k]
+            for row, recommendation in zip(chunk, self._recommend_crop_rows(chunk)):
+                found[cache_key(row)] = recommendation
+
+        return [found[key] for key in map(cache_key, rows)]
 
+    def _recommend_crop_rows(self, rows: List[dict]) -> List[CropRecommendation]:
+        rows_text = "\n".join(
+            f"{idx}. Location: {row['location']}; Soil Type: {row['soil_type']}; "
+            f"Season: {row['season']}; Farm Size: {row['farm_size']}"
+            for idx, row in enumerate(rows, 1)
+        )
+
+        def parse(data):
+            if len(data) != len(rows):
+                raise ValueError("Crop recommendation batch size mismatch")
+            return [_parse_crop(item) for item in data]
+
+        try:
+            recommendations = self._invoke_structured(
+                "crop recommendation batch", _render_crop_batch_prompt,
+                dict(rows=rows_text, count=len(rows)),
+                _crop_batch_adapter(len(rows)), parse, ("crop_name", "care_instructions"),
+                normalize=_normalize_crop_batch_reply
+            )
+        except RuntimeError:
+            # One prompt per farm so a single bad batch does not sink every row
+            return [self.get_crop_recommendation(**row) for row in rows]
+        for row, recommendation in zip(rows, recommendations):
+            self._cache[("crop recommendation", row["location"], row["soil_type"],
+                         row["season"], row["farm_size"])] = recommendation
+        return recommendations
 
     def diagnose_crop_disease(self, crop_type: str, symptoms: str, 
                              region: str) -> DiseaseAnalysis:
         """Diagnose crop diseases based on symptoms"""
-        parser = PydanticOutputParser(pydantic_object=DiseaseAnalysis)
-        
-        prompt = PromptTemplate(
-            template=(
-                "As a plant pathology expert familiar with Indian crop diseases, analyze this case:\n"
-                "Crop: {crop_type}\n"
-                "Symptoms: {symptoms}\n"
-                "Region: {region}\n\n"
-                "Provide detailed analysis in JSON format:\n"
-                '{{\n'
-                '  "disease_name": "Most likely disease based on symptoms",\n'
-                '  "severity": "Low/Medium/High",\n'
-                '  "symptoms": ["Key symptom 1", "Key symptom 2", "Key symptom 3"],\n'
-                '  "treatment": ["Treatment step 1", "Treatment step 2", "Treatment step 3"],\n'
-                '  "prevention": ["Prevention measure 1", "Prevention measure 2", "Prevention measure 3"]\n'
-                '}}\n\n'
-                "Focus on treatments available in Indian agricultural context.\n"
-                "Your response:"
-            ),
-            input_variables=["crop_type", "symptoms", "region"]
+        return self._invoke_structured(
+            "disease diagnosis", _render_disease_prompt,
+            dict(crop_type=crop_type, symptoms=symptoms, region=region),
+            _DISEASE_ADAPTER, _parse_disease, ("disease_name", "treatment")
+        )
+
+    async def a_diagnose_crop_disease(self, crop_type: str, symptoms: str,
+                                      region: str) -> DiseaseAnalysis:
+        """Async variant of diagnose_crop_disease"""
+        return await self._ainvoke_structured(
+            "disease diagnosis", _render_disease_prompt,
+            dict(crop_type=crop_type, symptoms=symptoms, region=region),
+            _DISEASE_ADAPTER, _parse_disease, ("disease_name", "treatment")
         )
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                response = self.llm.invoke(prompt.format(
-                    crop_type=crop_type, symptoms=symptoms, region=region
-                ))
-                
-                parsed_result = parser.parse(response.content)
-                
-                if not parsed_result.disease_name or not parsed_result.treatment:
-                    raise ValueError("Invalid disease analysis format")
-                
-                return parsed_result
-                
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    raise RuntimeError(f"Failed to generate disease diagnosis after {max_attempts} attempts: {str(e)}")
-                continue
 
     def analyze_soil_conditions(self, ph_level: float, organic_matter: str, 
                                drainage: str, region: str) -> SoilAnalysis:
         """Analyze soil conditions and provide recommendations"""
-        parser = PydanticOutputParser(pydantic_object=SoilAnalysis)
-        
-        prompt = PromptTemplate(
-            template=(
-                "As a soil scientist expert in Indian agricultural conditions, analyze these soil parameters:\n"
-                "pH Level: {ph_level}\n"
-                "Organic Matter: {organic_matter}\n"
-                "Drainage: {drainage}\n"
-                "Region: {region}\n\n"
-                "Provide comprehensive soil analysis in JSON format:\n"
-                '{{\n'
-                '  "soil_type": "Soil classification based on given parameters",\n'
-                '  "ph_level": "Analysis of pH level and its implications",\n'
-                '  "nutrient_status": ["Nutrient analysis 1", "Nutrient analysis 2", "Nutrient analysis 3"],\n'
-                '  "recommendations": ["Improvement suggestion 1", "Improvement suggestion 2", "Improvement suggestion 3"],\n'
-                '  "suitable_crops": ["Crop 1", "Crop 2", "Crop 3", "Crop 4"]\n'
-                '}}\n\n'
-                "Consider Indian soil types and regional agricultural practices.\n"
-                "Your response:"
-            ),
-            input_variables=["ph_level", "organic_matter", "drainage", "region"]
+        return self._invoke_structured(
+            "soil analysis", _render_soil_prompt,
+            dict(ph_level=ph_level, organic_matter=organic_matter,
+                 drainage=drainage, region=region),
+            _SOIL_ADAPTER, _parse_soil, ("soil_type", "recommendations")
+        )
+
+    async def a_analyze_soil_conditions(self, ph_level: float, organic_matter: str,
+                                        drainage: str, region: str) -> SoilAnalysis:
+        """Async variant of analyze_soil_conditions"""
+        return await self._ainvoke_structured(
+            "soil analysis", _render_soil_prompt,
+            dict(ph_level=ph_level, organic_matter=organic_matter,
+                 drainage=drainage, region=region),
+            _SOIL_ADAPTER, _parse_soil, ("soil_type", "recommendations")
         )
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                response = self.llm.invoke(prompt.format(
-                    ph_level=ph_level, organic_matter=organic_matter,
-                    drainage=drainage, region=region
-                ))
-                
-                parsed_result = parser.parse(response.content)
-                
-                if not parsed_result.soil_type or not parsed_result.recommendations:
-                    raise ValueError("Invalid soil analysis format")
-                
-                return parsed_result
-                
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    raise RuntimeError(f"Failed to generate soil analysis after {max_attempts} attempts: {str(e)}")
-                continue
 
     def get_weather_advisory(self, location: str, current_weather: str, 
                            crop_stage: str) -> WeatherAdvisory:
         """Provide weather-based farming advisory"""
-        parser = PydanticOutputParser(pydantic_object=WeatherAdvisory)
-        
-        prompt = PromptTemplate(
-            template=(
-                "As a meteorological agriculture advisor for Indian farming, provide weather-based guidance:\n"
-                "Location: {location}\n"
-                "Current Weather: {current_weather}\n"
-                "Crop Stage: {crop_stage}\n\n"
-                "Provide weather advisory in JSON format:\n"
-                '{{\n'
-                '  "current_conditions": "Summary of current weather conditions",\n'
-                '  "farming_impact": "How current weather affects farming activities",\n'
-                '  "recommendations": ["Weather-based advice 1", "Weather-based advice 2", "Weather-based advice 3"],\n'
-                '  "alerts": ["Important alert 1", "Important alert 2"]\n'
-                '}}\n\n'
-                "Consider Indian monsoon patterns and regional weather impacts.\n"
-                "Your response:"
-            ),
-            input_variables=["location", "current_weather", "crop_stage"]
+        return self._invoke_structured(
+            "weather advisory", _render_weather_prompt,
+            dict(location=location, current_weather=current_weather,
+                 crop_stage=crop_stage),
+            _WEATHER_ADAPTER, _parse_weather, ("current_conditions", "recommendations")
+        )
+
+    async def a_get_weather_advisory(self, location: str, current_weather: str,
+                                     crop_stage: str) -> WeatherAdvisory:
+        """Async variant of get_weather_advisory"""
+        return await self._ainvoke_structured(
+            "weather advisory", _render_weather_prompt,
+            dict(location=location, current_weather=current_weather,
+                 crop_stage=crop_stage),
+            _WEATHER_ADAPTER, _parse_weather, ("current_conditions", "recommendations")
         )
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                response = self.llm.invoke(prompt.format(
-                    location=location, current_weather=current_weather,
-                    crop_stage=crop_stage
-                ))
-                
-                parsed_result = parser.parse(response.content)
-                
-                if not parsed_result.current_conditions or not parsed_result.recommendations:
-                    raise ValueError("Invalid weather advisory format")
-                
-                return parsed_result
-                
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    raise RuntimeError(f"Failed to generate weather advisory after {max_attempts} attempts: {str(e)}")
-                continue
 
     def analyze_market_conditions(self, crop_name: str, location: str, 
                                  quantity: str) -> MarketAnalysis:
         """Analyze market conditions for crops"""
-        parser = PydanticOutputParser(pydantic_object=MarketAnalysis)
-        
-        prompt = PromptTemplate(
-            template=(
-                "As a market analyst specializing in Indian agricultural markets, analyze:\n"
-                "Crop: {crop_name}\n"
-                "Location: {location}\n"
-                "Quantity: {quantity}\n\n"
-                "Provide market analysis in JSON format:\n"
-                '{{\n'
-                '  "crop_name": "Crop being analyzed",\n'
-                '  "current_price": "Current market price range in Indian context",\n'
-                '  "price_trend": "Price trend analysis and future predictions",\n'
-                '  "demand_status": "Current market demand status",\n'
-                '  "selling_tips": ["Selling tip 1", "Selling tip 2", "Selling tip 3"]\n'
-                '}}\n\n'
-                "Consider Indian mandi prices and regional market variations.\n"
-                "Your response:"
-            ),
-            input_variables=["crop_name", "location", "quantity"]
+        return self._invoke_structured(
+            "market analysis", _render_market_prompt,
+            dict(crop_name=crop_name, location=location, quantity=quantity),
+            _MARKET_ADAPTER, _parse_market, ("crop_name", "selling_tips")
+        )
+
+    async def a_analyze_market_conditions(self, crop_name: str, location: str,
+                                          quantity: str) -> MarketAnalysis:
+        """Async variant of analyze_market_conditions"""
+        return await self._ainvoke_structured(
+            "market analysis", _render_market_prompt,
+            dict(crop_name=crop_name, location=location, quantity=quantity),
+            _MARKET_ADAPTER, _parse_market, ("crop_name", "selling_tips")
         )
-        
-        max_attempts = 3
-        for attempt in range(max_attempts):
-            try:
-                response = self.llm.invoke(prompt.format(
-                    crop_name=crop_name, location=location, quantity=quantity
-                ))
-                
-                parsed_result = parser.parse(response.content)
-                
-                # Validate the response
-                if not parsed_result.crop_name or not parsed_result.selling_tips:
-                    raise ValueError("Invalid market analysis format")
-                
-                return parsed_result
-                
-            except Exception as e:
-                if attempt == max_attempts - 1:
-                    raise RuntimeError(f"Failed to generate market analysis after {max_attempts} attempts: {str(e)}")
-                continue
@@ -1,131 +1,459 @@
 import streamlit as st
-import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from agricultural_util import GreenCureAI
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime
+import io
 import os
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from xml.sax.saxutils import escape
+
+# Static markup lives at module level so reruns reuse the same strings.
+# Streamlit drops elements a rerun does not emit, so they are still sent every run.
+_APP_CSS = """
+    <style>
+    div[data-testid="stHeading"] h2 {
+        font-size: 3rem;
+        color: #FFDBB6;
+        text-align: center;
+        margin-bottom: 2rem;
+    }
+    .metric-card {
+        background-color: #f0f8f0;
+        padding: 1rem;
+        border-radius: 0.5rem;
+        border-left: 4px solid #2E7D2E;
+    }
+    .stButton > button {
+        background-color: #2E7D2E;
+        color: white;
+        border-radius: 0.5rem;
+    }
+    .success-box {
+        background-color: #2F546B;
+        border: 1px solid #c3e6cb;
+        border-radius: 0.25rem;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    .info-box {
+        background-color: #383673;
+        border: 1px solid #bee5eb;
+        border-radius: 0.25rem;
+        padding: 1rem;
+        margin: 1rem 0;
+    }
+    </style>
+    """
+
+_QUICK_ACTIONS = (
+    """
+    <div class="info-box">
+    <h4>Smart Crop Advisory</h4>
+    <p>Get AI-powered crop recommendations based on your soil, climate, and market conditions.</p>
+    </div>
+    """,
+    """
+    <div class="info-box">
+    <h4>Disease Diagnosis</h4>
+    <p>Upload crop images or describe symptoms for instant disease identification and treatment.</p>
+    </div>
+    """,
+    """
+    <div class="info-box">
+    <h4>Soil Health</h4>
+    <p>Comprehensive soil analysis with personalized improvement recommendations.</p>
+    </div>
+    """
+)
+
+# Form options and lookups, built once at import rather than on every rerun
+_MENU_OPTIONS = (
+    "Dashboard",
+    "Crop Recommendations", 
+    "Disease Diagnosis",
+    "Soil Analysis",
+    "Weather Advisory",
+    "Market Analysis",
+    "Farm Analytics",
+    "Reports"
+)
+_API_KEY_NAMES = ("GROQ1", "GROQ2", "GROQ3", "GROQ4")
+_SOIL_TYPES = (
+    "Black Soil (Regur)", "Red Soil", "Alluvial Soil", 
+    "Laterite Soil", "Desert Soil", "Mountain Soil", 
+    "Clay", "Sandy", "Loamy"
+)
+_SEASONS = ("Kharif (Monsoon)", "Rabi (Winter)", "Zaid (Summer)")
+_FARM_SIZES = (
+    "Marginal (< 1 hectare)", 
+    "Small (1-2 hectares)", 
+    "Semi-medium (2-4 hectares)",
+    "Medium (4-10 hectares)", 
+    "Large (> 10 hectares)"
+)
+_CROP_TYPES = (
+    "Wheat", "Rice", "Cotton", "Sugarcane", "Soybean",
+    "Maize", "Bajra", "Jowar", "Potato", "Tomato", 
+    "Onion", "Garlic", "Chilli", "Other"
+)
+_MARKET_CROP_TYPES = (
+    "Wheat", "Rice", "Cotton", "Sugarcane", "Soybean",
+    "Maize", "Bajra", "Jowar", "Potato", "Tomato", 
+    "Onion", "Garlic", "Chilli", "Groundnut", "Other"
+)
+_QUANTITY_OPTIONS = (
+    "Small (< 10 quintals)", "Medium (10-50 quintals)", 
+    "Large (50-200 quintals)", "Bulk (> 200 quintals)"
+)
+_CROP_STAGES = (
+    "Land Preparation", "Sowing/Planting", "Germination", 
+    "Vegetative Growth", "Flowering/Pollination", 
+    "Fruit Development", "Maturity", "Harvesting"
+)
+_REPORT_TYPES = (
+    "Comprehensive Farm Report",
+    "Crop Recommendations Summary", 
+    "Disease Diagnosis History",
+    "Soil Analysis Summary",
+    "Weather Advisory Log",
+    "Market Analysis Report"
+)
+_ORGANIC_MATTER_LEVELS = (
+    "Very Low (< 0.5%)", "Low (0.5-1.0%)", "Medium (1.0-3.0%)", 
+    "Good (3.0-5.0%)", "High (> 5.0%)"
+)
+_DRAINAGE_LEVELS = ("Very Poor", "Poor", "Fair", "Good", "Excellent")
+_SEVERITY_EMOJI = {
+    "Low": "🟢",
+    "Medium": "🟡", 
+    "High": "🔴"
+}
+
+# Static report text; only the placeholders are filled per report
+_WEATHER_REPORT_TEMPLATE = """
+GREEN CURE - WEATHER ADVISORY REPORT
+==================================
+
+Location: {location}
+Crop Stage: {crop_stage}
+Date: {report_date}
+
+CURRENT WEATHER:
+{current_weather}
+
+WEATHER CONDITIONS ANALYSIS:
+{conditions}
+
+FARMING IMPACT:
+{farming_impact}
+
+IMMEDIATE RECOMMENDATIONS:
+{recommendations}
+
+ALERTS:
+{alerts}
+
+Generated by Green Cure AI Assistant
+"""
+_MARKET_REPORT_TEMPLATE = """
+GREEN CURE - MARKET ANALYSIS REPORT
+=================================
+
+Crop: {crop_type}
+Location: {location}
+Quantity: {quantity}
+Date: {report_date}
+
+CURRENT PRICING:
+{current_price}
+
+DEMAND STATUS:
+{demand_status}
+
+PRICE TREND:
+{price_trend}
+
+SELLING TIPS:
+{tips}
+
+Generated by Green Cure AI Assistant
+"""
+_RECS_SUMMARY_HEADER = """
+GREEN CURE - CROP RECOMMENDATIONS SUMMARY
+=======================================
+Generated on: {timestamp}
+
+Total Recommendations: {total}
+
+"""
+_TRUNCATED_NOTE = """Only the latest entries are kept; listing entries {first} to {total}.
+
+"""
+_DIAG_HISTORY_HEADER = """
+GREEN CURE - DISEASE DIAGNOSIS HISTORY
+====================================
+Generated on: {timestamp}
+
+Total Diagnoses: {total}
+
+"""
+
+def _chunks(seq, n):
+    """Yield consecutive slices of seq holding at most n items"""
+    for i in range(0, len(seq), n):
+        yield seq[i:i + n]
+
+def _now_str():
+    """Current local time as 'YYYY-MM-DD HH:MM:SS'; isoformat skips strftime's format parsing"""
+    return datetime.now().isoformat(sep=' ', timespec='seconds')
+
+def _report_stamps():
+    """Display and file-name forms of a single clock reading, so a report and its file agree"""
+    generated_on = _now_str()
+    # 'YYYY-MM-DD HH:MM:SS' -> 'YYYYMMDD_HHMMSS'
+    return generated_on, generated_on.replace('-', '').replace(':', '').replace(' ', '_')
+
+# Entries kept per history; older ones are dropped so long sessions stay bounded
+_HISTORY_LIMIT = 500
+# Characters of a text report shown in its on-page preview
+_PREVIEW_LIMIT = 20_000
+
+def _history(*fields):
+    """Empty column store for one history: a bounded deque per field plus the timestamp"""
+    return {field: deque(maxlen=_HISTORY_LIMIT) for field in (*fields, 'timestamp')}
+
+def _tail(column, n):
+    """Iterate the last n entries of a history column"""
+    return islice(column, max(len(column) - n, 0), None)
 
 class GreenCureManager:
     def __init__(self):
-        self.recommendations = []
-        self.diagnoses = []
-        self.soil_analyses = []
-        self.weather_advisories = []
-        self.market_analyses = []
+        # Histories are stored column-wise: one bounded deque per field, aligned by entry index
+        self.recommendations = _history(
+            'location', 'soil_type', 'season', 'farm_size', 'crop_name',
+            'planting_season', 'expected_yield', 'market_value', 'care_instructions'
+        )
+        self.diagnoses = _history(
+            'crop_type', 'region', 'symptoms_described', 'disease_name',
+            'severity', 'symptoms', 'treatment', 'prevention'
+        )
+        self.soil_analyses = _history(
+            'region', 'ph_level_input', 'organic_matter', 'drainage', 'soil_type',
+            'ph_analysis', 'nutrient_status', 'recommendations', 'suitable_crops'
+        )
+        self.weather_advisories = _history(
+            'location', 'current_weather', 'crop_stage', 'conditions',
+            'farming_impact', 'recommendations', 'alerts'
+        )
+        self.market_analyses = _history(
+            'crop_type', 'location', 'quantity', 'current_price',
+            'price_trend', 'demand_status', 'selling_tips'
+        )
+        # Running count and latest record per history, kept current by the add_* methods
+        self._counts = {'rec': 0, 'diag': 0, 'soil': 0, 'weather': 0, 'market': 0}
+        self._last = dict.fromkeys(self._counts)
+        # Columns, count and latest record change together, so each add holds the lock
+        self._lock = threading.Lock()
+
+    def _append(self, key, history, data):
+        record = {
+            **data,
+            'timestamp': _now_str()
+        }
+        with self._lock:
+            for field, column in history.items():
+                column.append(record.get(field, 'N/A'))
+            self._counts[key] += 1
+            self._last[key] = record
+
+    @property
+    def counts(self):
+        """Snapshot of the running entry count per history"""
+        with self._lock:
+            return dict(self._counts)
+
+    def latest(self, key):
+        """Most recent record added to a history, or None if it is still empty"""
+        return self._last[key]
+
+    def snapshot(self, key, history, fields, n=_HISTORY_LIMIT):
+        """Running count of a history and lists of the last n entries of the given columns
+
+        Copied under the lock, since iterating a deque that another thread
+        appends to raises RuntimeError and the columns must stay aligned.
+        """
+        with self._lock:
+            return self._counts[key], [list(_tail(history[field], n)) for field in fields]
 
     def add_recommendation(self, recommendation_data):
         """Add crop recommendation to history"""
-        self.recommendations.append({
-            **recommendation_data,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
+        self._append('rec', self.recommendations, recommendation_data)
 
     def add_diagnosis(self, diagnosis_data):
         """Add disease diagnosis to history"""
-        self.diagnoses.append({
-            **diagnosis_data,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
+        self._append('diag', self.diagnoses, diagnosis_data)
 
     def add_soil_analysis(self, soil_data):
         """Add soil analysis to history"""
-        self.soil_analyses.append({
-            **soil_data,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
+        self._append('soil', self.soil_analyses, soil_data)
 
-    def add_weather_advisory(self, weather_data):
+    def add_weather_advisory(self, location, current_weather, crop_stage, advisory):
         """Add weather advisory to history"""
-        self.weather_advisories.append({
-            **weather_data,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._append('weather', self.weather_advisories, {
+            'location': location,
+            'current_weather': current_weather,
+            'crop_stage': crop_stage,
+            'conditions': advisory.current_conditions,
+            'farming_impact': advisory.farming_impact,
+            'recommendations': advisory.recommendations,
+            'alerts': advisory.alerts
         })
 
-    def add_market_analysis(self, market_data):
+    def add_market_analysis(self, crop_type, location, quantity, analysis):
         """Add market analysis to history"""
-        self.market_analyses.append({
-            **market_data,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._append('market', self.market_analyses, {
+            'crop_type': crop_type,
+            'location': location,
+            'quantity': quantity,
+            'current_price': analysis.current_price,
+            'price_trend': analysis.price_trend,
+            'demand_status': analysis.demand_status,
+            'selling_tips': analysis.selling_tips
         })
 
     def generate_comprehensive_report(self):
         """Generate comprehensive farm report"""
+        # reportlab is only imported once a PDF is actually requested
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.styles import ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            generated_on, timestamp = _report_stamps()
             filename = f"green_cure_comprehensive_report_{timestamp}.pdf"
             os.makedirs('results', exist_ok=True)
             full_path = os.path.join('results', filename)
             
-            c = canvas.Canvas(full_path, pagesize=letter)
-            width, height = letter
-            y = height - 40
-            
-            c.setFont("Helvetica-Bold", 16)
-            c.drawString(40, y, "Green Cure - Comprehensive Agricultural Report")
-            y -= 40
-            
-            c.setFont("Helvetica", 12)
-            c.drawString(40, y, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            y -= 30
+            heading_style = ParagraphStyle('Heading', fontName="Helvetica-Bold", fontSize=14, leading=20)
+            body_style = ParagraphStyle('Body', fontName="Helvetica", fontSize=10, leading=15)
+            story = [
+                Paragraph("Green Cure - Comprehensive Agricultural Report",
+                          ParagraphStyle('Title', fontName="Helvetica-Bold", fontSize=16, leading=40)),
+                Paragraph(f"Generated on: {generated_on}",
+                          ParagraphStyle('Generated', fontName="Helvetica", fontSize=12, leading=30))
+            ]
             
-            if self.recommendations:
-                c.setFont("Helvetica-Bold", 14)
-                c.drawString(40, y, "CROP RECOMMENDATIONS")
-                y -= 20
-                c.setFont("Helvetica", 10)
+            rec_total, recs = self.snapshot('rec', self.recommendations, (
+                'crop_name', 'planting_season', 'expected_yield', 'timestamp'
+            ), 3)
+            if rec_total:
+                story.append(Paragraph("CROP RECOMMENDATIONS", heading_style))
                 
-                for i, rec in enumerate(self.recommendations[-3:], 1): 
+                for i, (crop_name, planting_season, expected_yield, created) in enumerate(zip(*recs), 1):
                     lines = [
                         f"Recommendation {i}:",
-                        f"Crop: {rec.get('crop_name', 'N/A')}",
-                        f"Season: {rec.get('planting_season', 'N/A')}",
-                        f"Expected Yield: {rec.get('expected_yield', 'N/A')}",
-                        f"Timestamp: {rec.get('timestamp', 'N/A')}",
+                        f"Crop: {crop_name}",
+                        f"Season: {planting_season}",
+                        f"Expected Yield: {expected_yield}",
+                        f"Timestamp: {created}",
                         "-" * 60
                     ]
-                    
-                    for line in lines:
-                        if y < 60:
-                            c.showPage()
-                            y = height - 40
-                        c.drawString(40, y, line)
-                        y -= 15
-                y -= 10
+                    # One flowable per record; Paragraph parses markup, so AI-generated text is escaped
+                    story.append(Paragraph("<br/>".join(map(escape, lines)), body_style))
+                story.append(Spacer(1, 10))
             
-            if self.diagnoses:
-                c.setFont("Helvetica-Bold", 14)
-                c.drawString(40, y, "DISEASE DIAGNOSES")
-                y -= 20
-                c.setFont("Helvetica", 10)
+            diag_total, diags = self.snapshot('diag', self.diagnoses, (
+                'disease_name', 'severity', 'timestamp'
+            ), 3)
+            if diag_total:
+                story.append(Paragraph("DISEASE DIAGNOSES", heading_style))
                 
-                for i, diag in enumerate(self.diagnoses[-3:], 1): 
+                for i, (disease_name, severity, created) in enumerate(zip(*diags), 1):
                     lines = [
                         f"Diagnosis {i}:",
-                        f"Disease: {diag.get('disease_name', 'N/A')}",
-                        f"Severity: {diag.get('severity', 'N/A')}",
-                        f"Timestamp: {diag.get('timestamp', 'N/A')}",
+                        f"Disease: {disease_name}",
+                        f"Severity: {severity}",
+                        f"Timestamp: {created}",
                         "-" * 60
                     ]
-                    
-                    for line in lines:
-                        if y < 60:
-                            c.showPage()
-                            y = height - 40
-                        c.drawString(40, y, line)
-                        y -= 15
-                y -= 10
+                    story.append(Paragraph("<br/>".join(map(escape, lines)), body_style))
+                story.append(Spacer(1, 10))
             
-            c.save()
+            # Platypus lays out and flushes each page as its frame fills
+            doc = SimpleDocTemplate(full_path, pagesize=letter,
+                                    leftMargin=40, rightMargin=40, topMargin=40, bottomMargin=60)
+            doc.build(story)
             return full_path
             
         except Exception as e:
             st.error(f"Error generating report: {e}")
             return None
 
+@st.cache_resource(show_spinner=False)
+def _get_ai(selected_api):
+    """One GreenCureAI per API key, reused across reruns and sessions"""
+    return GreenCureAI(selected_api)
+
+@st.cache_resource(show_spinner=False)
+def _ai_executor():
+    """Process-wide worker pool so AI calls never block the script thread"""
+    return ThreadPoolExecutor(max_workers=8)
+
+def _run_with_ctx(ctx, fn, *args):
+    """Run fn(*args) on a pool worker with the submitting session's script context attached
+
+    The context is detached again afterwards, so an idle worker does not keep
+    a finished session (and its session state) reachable.
+    """
+    thread = threading.current_thread()
+    before = set(vars(thread))
+    add_script_run_ctx(thread, ctx)
+    attached = set(vars(thread)) - before
+    try:
+        return fn(*args)
+    finally:
+        for attr in attached:
+            delattr(thread, attr)
+
+def _start_job(name, fn, *args):
+    """Run fn(*args) in the background, replacing any earlier job of the same name
+
+    Resubmitting the inputs of the last completed job reuses its result
+    without another AI call, and flags the job as not fresh so pages skip
+    storing it in the history twice.
+    """
+    jobs = st.session_state.setdefault('ai_jobs', {})
+    last = st.session_state.setdefault('ai_last', {}).get(name)
+    if last is not None and last[0] == args:
+        jobs[name] = (args, last[1], False)
+        return
+    future = _ai_executor().submit(_run_with_ctx, get_script_run_ctx(), fn, *args)
+    jobs[name] = (args, future, True)
+
+@st.fragment(run_every=0.5)
+def _poll_job(name, message):
+    """Show progress while the job runs, then rerun the page to render its result"""
+    job = st.session_state.ai_jobs.get(name)
+    if job is None or job[1].done():
+        st.rerun()
+    st.status(message, state="running")
+
+def _finished_job(name, message):
+    """Return (args, future, fresh) of a completed job, polling for it while it still runs"""
+    job = st.session_state.get('ai_jobs', {}).get(name)
+    if job is None:
+        return None
+    if not job[1].done():
+        _poll_job(name, message)
+        return None
+    args, future, _ = st.session_state.ai_jobs.pop(name)
+    if future.exception() is None:
+        st.session_state.ai_last[name] = (args, future)
+    return job
+
 def main():
     st.set_page_config(
         page_title="Green Cure - Agricultural AI Assistant",
@@ -137,66 +465,20 @@ def main():
     if 'green_cure_manager' not in st.session_state:
         st.session_state.green_cure_manager = GreenCureManager()
     
-    st.markdown("""
-    <style>
-    .main-header {
-        font-size: 3rem;
-        color: #FFDBB6;
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    .metric-card {
-        background-color: #f0f8f0;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #2E7D2E;
-    }
-    .stButton > button {
-        background-color: #2E7D2E;
-        color: white;
-        border-radius: 0.5rem;
-    }
-    .success-box {
-        background-color: #2F546B;
-        border: 1px solid #c3e6cb;
-        border-radius: 0.25rem;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    .info-box {
-        background-color: #383673;
-        border: 1px solid #bee5eb;
-        border-radius: 0.25rem;
-        padding: 1rem;
-        margin: 1rem 0;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    st.markdown(_APP_CSS, unsafe_allow_html=True)
     
     st.sidebar.title("Green Cure")
     st.sidebar.markdown("*AI-Powered Agricultural Solutions*")
     st.sidebar.markdown("---")
     
-    menu_options = [
-        "Dashboard",
-        "Crop Recommendations", 
-        "Disease Diagnosis",
-        "Soil Analysis",
-        "Weather Advisory",
-        "Market Analysis",
-        "Farm Analytics",
-        "Reports"
-    ]
-    
-    selected_option = st.sidebar.selectbox("Choose Service", menu_options)
+    selected_option = st.sidebar.selectbox("Choose Service", _MENU_OPTIONS)
     
     st.sidebar.markdown("---")
     st.sidebar.subheader("AI Configuration")
-    api_keys = ["GROQ1", "GROQ2", "GROQ3", "GROQ4"]
-    selected_api = st.sidebar.selectbox("Select AI Model", api_keys)
+    selected_api = st.sidebar.selectbox("Select AI Model", _API_KEY_NAMES)
     
     try:
-        ai_assistant = GreenCureAI(selected_api)
+        ai_assistant = _get_ai(selected_api)
         st.sidebar.success(f"AI Model {selected_api} Ready")
     except Exception as e:
         st.sidebar.error(f"Failed to initialize AI: {str(e)[:50]}...")
@@ -221,9 +503,12 @@ def main():
         display_reports()
 
 def display_dashboard():
-    st.markdown('<h1 class="main-header">Green Cure Dashboard</h1>', unsafe_allow_html=True)
+    st.header("Green Cure Dashboard")
     st.markdown("Welcome to your AI-powered agricultural assistant")
     
+    mgr = st.session_state.green_cure_manager
+    rec_count = mgr.counts['rec']
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -250,83 +535,51 @@ def display_dashboard():
     with col4:
         st.metric(
             label="Recommendations", 
-            value=str(len(st.session_state.green_cure_manager.recommendations)), 
-            delta="+" + str(len(st.session_state.green_cure_manager.recommendations)),
+            value=str(rec_count), 
+            delta=f"+{rec_count}",
             help="Total AI recommendations generated"
         )
     
     st.markdown("---")
     
     st.subheader("Quick Actions")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div class="info-box">
-        <h4>Smart Crop Advisory</h4>
-        <p>Get AI-powered crop recommendations based on your soil, climate, and market conditions.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="info-box">
-        <h4>Disease Diagnosis</h4>
-        <p>Upload crop images or describe symptoms for instant disease identification and treatment.</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="info-box">
-        <h4>Soil Health</h4>
-        <p>Comprehensive soil analysis with personalized improvement recommendations.</p>
-        </div>
-        """, unsafe_allow_html=True)
+    for col, info_box in zip(st.columns(3), _QUICK_ACTIONS):
+        with col:
+            st.markdown(info_box, unsafe_allow_html=True)
     
     st.subheader("Recent Activities")
     
-    activities_data = []
-    
-    if st.session_state.green_cure_manager.recommendations:
-        activities_data.append({
-            'Date': st.session_state.green_cure_manager.recommendations[-1].get('timestamp', 'N/A'),
-            'Activity': 'Crop Recommendation Generated',
-            'Status': 'Completed',
-            'Type': 'Recommendation'
-        })
+    # Columnar dict: pandas builds each column directly instead of inferring per row
+    dates, activities, statuses, types = [], [], [], []
     
-    if st.session_state.green_cure_manager.diagnoses:
-        activities_data.append({
-            'Date': st.session_state.green_cure_manager.diagnoses[-1].get('timestamp', 'N/A'),
-            'Activity': 'Disease Diagnosis Completed',
-            'Status': 'Completed',
-            'Type': 'Diagnosis'
-        })
+    for key, activity, activity_type in (
+        ('rec', 'Crop Recommendation Generated', 'Recommendation'),
+        ('diag', 'Disease Diagnosis Completed', 'Diagnosis'),
+        ('soil', 'Soil Analysis Completed', 'Analysis')
+    ):
+        last = mgr.latest(key)
+        if last:
+            dates.append(last['timestamp'])
+            activities.append(activity)
+            statuses.append('Completed')
+            types.append(activity_type)
+    activities_data = {'Date': dates, 'Activity': activities, 'Status': statuses, 'Type': types}
     
-    if st.session_state.green_cure_manager.soil_analyses:
-        activities_data.append({
-            'Date': st.session_state.green_cure_manager.soil_analyses[-1].get('timestamp', 'N/A'),
-            'Activity': 'Soil Analysis Completed',
-            'Status': 'Completed',
-            'Type': 'Analysis'
-        })
+    if not dates:
+        activities_data = {
+            'Date': ['No activities yet'],
+            'Activity': ['Start by using any Green Cure service'],
+            'Status': ['Pending'],
+            'Type': ['Getting Started']
+        }
     
-    if not activities_data:
-        activities_data = [
-            {
-                'Date': 'No activities yet',
-                'Activity': 'Start by using any Green Cure service',
-                'Status': 'Pending',
-                'Type': 'Getting Started'
-            }
-        ]
-    
-    activities_df = pd.DataFrame(activities_data)
-    st.dataframe(activities_df, use_container_width=True)
+    # pandas is imported on first use rather than at app start-up
+    import pandas as pd
+    activities_df = pd.DataFrame(activities_data).astype({'Status': 'category', 'Type': 'category'})
+    st.table(activities_df)
 
 def display_crop_recommendations(ai_assistant):
-    st.markdown('<h1 class="main-header">Smart Crop Recommendations</h1>', unsafe_allow_html=True)
+    st.header("Smart Crop Recommendations")
     st.markdown("Get AI-powered crop recommendations tailored for Indian farming conditions")
     
     with st.form("crop_recommendation_form"):
@@ -340,23 +593,11 @@ def display_crop_recommendations(ai_assistant):
                 placeholder="e.g., Guna, Madhya Pradesh",
                 help="Enter your district and state"
             )
-            soil_type = st.selectbox("Soil Type", [
-                "Black Soil (Regur)", "Red Soil", "Alluvial Soil", 
-                "Laterite Soil", "Desert Soil", "Mountain Soil", 
-                "Clay", "Sandy", "Loamy"
-            ])
+            soil_type = st.selectbox("Soil Type", _SOIL_TYPES)
         
         with col2:
-            season = st.selectbox("Season", [
-                "Kharif (Monsoon)", "Rabi (Winter)", "Zaid (Summer)"
-            ])
-            farm_size = st.selectbox("Farm Size", [
-                "Marginal (< 1 hectare)", 
-                "Small (1-2 hectares)", 
-                "Semi-medium (2-4 hectares)",
-                "Medium (4-10 hectares)", 
-                "Large (> 10 hectares)"
-            ])
+            season = st.selectbox("Season", _SEASONS)
+            farm_size = st.selectbox("Farm Size", _FARM_SIZES)
         
         submitted = st.form_submit_button("Get AI Recommendations", type="primary", use_container_width=True)
     
@@ -365,60 +606,67 @@ def display_crop_recommendations(ai_assistant):
             st.error("Please enter your location")
             return
             
-        with st.spinner("AI is analyzing your farming conditions..."):
-            try:
-                recommendation = ai_assistant.get_crop_recommendation(
-                    location, soil_type, season, farm_size
-                )
-                
-                recommendation_data = {
-                    'location': location,
-                    'soil_type': soil_type,
-                    'season': season,
-                    'farm_size': farm_size,
-                    'crop_name': recommendation.crop_name,
-                    'planting_season': recommendation.planting_season,
-                    'expected_yield': recommendation.expected_yield,
-                    'market_value': recommendation.market_value,
-                    'care_instructions': recommendation.care_instructions
-                }
-                st.session_state.green_cure_manager.add_recommendation(recommendation_data)
-                
-                # Display results
-                st.success("Recommendations Generated Successfully!")
-                
-                # Main recommendation display
-                st.markdown("---")
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.markdown(f"### Recommended Crop: **{recommendation.crop_name}**")
-                    
-                    info_col1, info_col2 = st.columns(2)
-                    with info_col1:
-                        st.info(f"**Best Planting Season:** {recommendation.planting_season}")
-                    with info_col2:
-                        st.info(f"**Expected Yield:** {recommendation.expected_yield}")
-                    
-                    st.success(f"**Market Value:** {recommendation.market_value}")
-                    
-                    st.markdown("### Detailed Care Instructions")
-                    for idx, instruction in enumerate(recommendation.care_instructions, 1):
-                        st.markdown(f"**{idx}.** {instruction}")
-                
-                with col2:
-                    # Farm summary card
-                    st.markdown("### Farm Summary")
-                    st.markdown(f"**Location:** {location}")
-                    st.markdown(f"**Soil:** {soil_type}")
-                    st.markdown(f"**Season:** {season}")
-                    st.markdown(f"**Size:** {farm_size}")
-                    
-                    # Action buttons OUTSIDE form
-                    st.markdown("### Actions")
-                    
-                    # Generate detailed report
-                    report_content = f"""
+        _start_job("crop", ai_assistant.get_crop_recommendation,
+                   location, soil_type, season, farm_size)
+
+    job = _finished_job("crop", "AI is analyzing your farming conditions...")
+    if job is None:
+        return
+    (location, soil_type, season, farm_size), future, fresh = job
+    try:
+        recommendation = future.result()
+        
+        recommendation_data = {
+            'location': location,
+            'soil_type': soil_type,
+            'season': season,
+            'farm_size': farm_size,
+            'crop_name': recommendation.crop_name,
+            'planting_season': recommendation.planting_season,
+            'expected_yield': recommendation.expected_yield,
+            'market_value': recommendation.market_value,
+            'care_instructions': recommendation.care_instructions
+        }
+        if fresh:
+            st.session_state.green_cure_manager.add_recommendation(recommendation_data)
+        
+        # Display results
+        st.success("Recommendations Generated Successfully!")
+        
+        # Main recommendation display
+        st.markdown("---")
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.markdown(f"### Recommended Crop: **{recommendation.crop_name}**")
+            
+            info_col1, info_col2 = st.columns(2)
+            with info_col1:
+                st.info(f"**Best Planting Season:** {recommendation.planting_season}")
+            with info_col2:
+                st.info(f"**Expected Yield:** {recommendation.expected_yield}")
+            
+            st.success(f"**Market Value:** {recommendation.market_value}")
+            
+            st.subheader("Detailed Care Instructions")
+            st.markdown("\n\n".join(f"**{idx}.** {instruction}" for idx, instruction in enumerate(recommendation.care_instructions, 1)))
+        
+        with col2:
+            # Farm summary card
+            st.subheader("Farm Summary")
+            st.markdown(f"**Location:** {location}")
+            st.markdown(f"**Soil:** {soil_type}")
+            st.markdown(f"**Season:** {season}")
+            st.markdown(f"**Size:** {farm_size}")
+            
+            # Action buttons OUTSIDE form
+            st.subheader("Actions")
+            
+            # Generate detailed report
+            report_date, file_stamp = _report_stamps()
+            buf = io.StringIO()
+            w = buf.write
+            w(f"""
 GREEN CURE - CROP RECOMMENDATION REPORT
 =====================================
 
@@ -427,7 +675,7 @@ Farm Details:
 - Soil Type: {soil_type}
 - Season: {season}
 - Farm Size: {farm_size}
-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- Date: {report_date}
 
 RECOMMENDATION:
 Crop: {recommendation.crop_name}
@@ -436,25 +684,28 @@ Expected Yield: {recommendation.expected_yield}
 Market Value: {recommendation.market_value}
 
 CARE INSTRUCTIONS:
-{chr(10).join([f"{i+1}. {instruction}" for i, instruction in enumerate(recommendation.care_instructions)])}
-
+""")
+            for i, instruction in enumerate(recommendation.care_instructions, 1):
+                w(f"{i}. {instruction}\n")
+            w("""
 Generated by Green Cure AI Assistant
-                    """
-                    
-                    st.download_button(
-                        "Download Report",
-                        data=report_content,
-                        file_name=f"crop_recommendation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
-                
-            except Exception as e:
-                st.error(f"Error generating recommendations: {str(e)}")
-                st.info("Try different inputs or check your internet connection")
+            """)
+            report_content = buf.getvalue()
+            
+            st.download_button(
+                "Download Report",
+                data=report_content,
+                file_name=f"crop_recommendation_{file_stamp}.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
+        
+    except Exception as e:
+        st.error(f"Error generating recommendations: {str(e)}")
+        st.info("Try different inputs or check your internet connection")
 
 def display_disease_diagnosis(ai_assistant):
-    st.markdown('<h1 class="main-header">Smart Disease Diagnosis</h1>', unsafe_allow_html=True)
+    st.header("Smart Disease Diagnosis")
     st.markdown("AI-powered crop disease identification and treatment recommendations")
     
     with st.form("disease_diagnosis_form"):
@@ -463,11 +714,7 @@ def display_disease_diagnosis(ai_assistant):
         col1, col2 = st.columns(2)
         
         with col1:
-            crop_type = st.selectbox("Crop Type", [
-                "Wheat", "Rice", "Cotton", "Sugarcane", "Soybean",
-                "Maize", "Bajra", "Jowar", "Potato", "Tomato", 
-                "Onion", "Garlic", "Chilli", "Other"
-            ])
+            crop_type = st.selectbox("Crop Type", _CROP_TYPES)
             region = st.text_input("Region/State", placeholder="e.g., Madhya Pradesh")
         
         with col2:
@@ -486,70 +733,69 @@ def display_disease_diagnosis(ai_assistant):
             st.error("Please fill in all required fields")
             return
             
-        with st.spinner("AI is analyzing crop symptoms..."):
-            try:
-                diagnosis = ai_assistant.diagnose_crop_disease(
-                    crop_type, symptoms, region
-                )
-                
-                # Store in session state
-                diagnosis_data = {
-                    'crop_type': crop_type,
-                    'region': region,
-                    'symptoms_described': symptoms,
-                    'disease_name': diagnosis.disease_name,
-                    'severity': diagnosis.severity,
-                    'symptoms': diagnosis.symptoms,
-                    'treatment': diagnosis.treatment,
-                    'prevention': diagnosis.prevention
-                }
-                st.session_state.green_cure_manager.add_diagnosis(diagnosis_data)
-                
-                # Display results
-                st.success("Disease Diagnosis Complete!")
-                
-                # Severity indicator
-                severity_colors = {
-                    "Low": "🟢",
-                    "Medium": "🟡", 
-                    "High": "🔴"
-                }
-                
-                severity_emoji = severity_colors.get(diagnosis.severity, "🔵")
-                
-                st.markdown("---")
-                st.markdown(f"### Diagnosed Disease: **{diagnosis.disease_name}**")
-                st.markdown(f"### {severity_emoji} Severity Level: **{diagnosis.severity}**")
-                
-                # Main content in columns
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    st.markdown("#### 🔍 Identified Symptoms")
-                    for symptom in diagnosis.symptoms:
-                        st.markdown(f"• {symptom}")
-                    
-                    st.markdown("#### Treatment Recommendations")
-                    for idx, treatment in enumerate(diagnosis.treatment, 1):
-                        st.markdown(f"**{idx}.** {treatment}")
-                
-                with col2:
-                    st.markdown("#### Prevention Measures")
-                    for idx, prevention in enumerate(diagnosis.prevention, 1):
-                        st.markdown(f"**{idx}.** {prevention}")
-                    
-                    # Action section
-                    st.markdown("#### Actions")
-                    
-                    # Generate report
-                    diagnosis_report = f"""
+        _start_job("disease", ai_assistant.diagnose_crop_disease,
+                   crop_type, symptoms, region)
+
+    job = _finished_job("disease", "AI is analyzing crop symptoms...")
+    if job is None:
+        return
+    (crop_type, symptoms, region), future, fresh = job
+    try:
+        diagnosis = future.result()
+        
+        # Store in session state
+        diagnosis_data = {
+            'crop_type': crop_type,
+            'region': region,
+            'symptoms_described': symptoms,
+            'disease_name': diagnosis.disease_name,
+            'severity': diagnosis.severity,
+            'symptoms': diagnosis.symptoms,
+            'treatment': diagnosis.treatment,
+            'prevention': diagnosis.prevention
+        }
+        if fresh:
+            st.session_state.green_cure_manager.add_diagnosis(diagnosis_data)
+        
+        # Display results
+        st.success("Disease Diagnosis Complete!")
+        
+        # Severity indicator
+        severity_emoji = _SEVERITY_EMOJI.get(diagnosis.severity, "🔵")
+        
+        st.markdown("---")
+        st.markdown(f"### Diagnosed Disease: **{diagnosis.disease_name}**")
+        st.markdown(f"### {severity_emoji} Severity Level: **{diagnosis.severity}**")
+        
+        # Main content in columns
+        col1, col2 = st.columns([1, 1])
+        
+        with col1:
+            st.subheader("🔍 Identified Symptoms")
+            st.markdown("\n\n".join(f"• {symptom}" for symptom in diagnosis.symptoms))
+            
+            st.subheader("Treatment Recommendations")
+            st.markdown("\n\n".join(f"**{idx}.** {treatment}" for idx, treatment in enumerate(diagnosis.treatment, 1)))
+        
+        with col2:
+            st.subheader("Prevention Measures")
+            st.markdown("\n\n".join(f"**{idx}.** {prevention}" for idx, prevention in enumerate(diagnosis.prevention, 1)))
+            
+            # Action section
+            st.subheader("Actions")
+            
+            # Generate report
+            report_date, file_stamp = _report_stamps()
+            buf = io.StringIO()
+            w = buf.write
+            w(f"""
 GREEN CURE - DISEASE DIAGNOSIS REPORT
 ===================================
 
 Crop Information:
 - Crop Type: {crop_type}
 - Region: {region}
-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- Date: {report_date}
 
 Symptoms Described:
 {symptoms}
@@ -559,31 +805,64 @@ Disease: {diagnosis.disease_name}
 Severity: {diagnosis.severity}
 
 IDENTIFIED SYMPTOMS:
-{chr(10).join([f"• {symptom}" for symptom in diagnosis.symptoms])}
-
+""")
+            for symptom in diagnosis.symptoms:
+                w(f"• {symptom}\n")
+            w("""
 TREATMENT RECOMMENDATIONS:
-{chr(10).join([f"{i+1}. {treatment}" for i, treatment in enumerate(diagnosis.treatment)])}
-
+""")
+            for i, treatment in enumerate(diagnosis.treatment, 1):
+                w(f"{i}. {treatment}\n")
+            w("""
 PREVENTION MEASURES:
-{chr(10).join([f"{i+1}. {prevention}" for i, prevention in enumerate(diagnosis.prevention)])}
-
+""")
+            for i, prevention in enumerate(diagnosis.prevention, 1):
+                w(f"{i}. {prevention}\n")
+            w("""
 Generated by Green Cure AI Assistant
-                    """
-                    
-                    st.download_button(
-                        "Download Diagnosis Report",
-                        data=diagnosis_report,
-                        file_name=f"disease_diagnosis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
-                
-            except Exception as e:
-                st.error(f"Error in diagnosis: {str(e)}")
-                st.info("Try describing symptoms more clearly or check your connection")
+            """)
+            diagnosis_report = buf.getvalue()
+            
+            st.download_button(
+                "Download Diagnosis Report",
+                data=diagnosis_report,
+                file_name=f"disease_diagnosis_{file_stamp}.txt",
+                mime="text/plain",
+                use_container_width=True
+            )
+        
+    except Exception as e:
+        st.error(f"Error in diagnosis: {str(e)}")
+        st.info("Try describing symptoms more clearly or check your connection")
+
+@st.cache_data(show_spinner=False)
+def _ph_gauge(ph_level):
+    """pH gauge figure, built once per distinct reading"""
+    import plotly.graph_objects as go
+    return go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=ph_level,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': "Soil pH Level"},
+        delta={'reference': 7},
+        gauge={
+            'axis': {'range': [None, 14]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 6], 'color': "lightcoral"},
+                {'range': [6, 8], 'color': "lightgreen"},
+                {'range': [8, 14], 'color': "lightcoral"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 7
+            }
+        }
+    ))
 
 def display_soil_analysis(ai_assistant):
-    st.markdown('<h1 class="main-header">Smart Soil Analysis</h1>', unsafe_allow_html=True)
+    st.header("Smart Soil Analysis")
     st.markdown("Comprehensive soil health assessment and improvement recommendations")
     
     with st.form("soil_analysis_form"):
@@ -593,15 +872,10 @@ def display_soil_analysis(ai_assistant):
         
         with col1:
             ph_level = st.slider("Soil pH Level", 1.0, 14.0, 7.0, 0.1)
-            organic_matter = st.selectbox("🍃 Organic Matter Content", [
-                "Very Low (< 0.5%)", "Low (0.5-1.0%)", "Medium (1.0-3.0%)", 
-                "Good (3.0-5.0%)", "High (> 5.0%)"
-            ])
+            organic_matter = st.selectbox("🍃 Organic Matter Content", _ORGANIC_MATTER_LEVELS)
         
         with col2:
-            drainage = st.selectbox("Drainage Quality", [
-                "Very Poor", "Poor", "Fair", "Good", "Excellent"
-            ])
+            drainage = st.selectbox("Drainage Quality", _DRAINAGE_LEVELS)
             region = st.text_input("Region/District", placeholder="e.g., Guna, Madhya Pradesh")
         
         # Only form submit button inside form
@@ -613,93 +887,71 @@ def display_soil_analysis(ai_assistant):
             st.error("Please enter your region")
             return
             
-        with st.spinner("AI is analyzing soil conditions..."):
-            try:
-                analysis = ai_assistant.analyze_soil_conditions(
-                    ph_level, organic_matter, drainage, region
-                )
-                
-                # Store in session state
-                soil_data = {
-                    'region': region,
-                    'ph_level_input': ph_level,
-                    'organic_matter': organic_matter,
-                    'drainage': drainage,
-                    'soil_type': analysis.soil_type,
-                    'ph_analysis': analysis.ph_level,
-                    'nutrient_status': analysis.nutrient_status,
-                    'recommendations': analysis.recommendations,
-                    'suitable_crops': analysis.suitable_crops
-                }
-                st.session_state.green_cure_manager.add_soil_analysis(soil_data)
-                
-                # Display results
-                st.success("Soil Analysis Complete!")
-                
-                # pH level visualization
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number+delta",
-                    value=ph_level,
-                    domain={'x': [0, 1], 'y': [0, 1]},
-                    title={'text': "Soil pH Level"},
-                    delta={'reference': 7},
-                    gauge={
-                        'axis': {'range': [None, 14]},
-                        'bar': {'color': "darkblue"},
-                        'steps': [
-                            {'range': [0, 6], 'color': "lightcoral"},
-                            {'range': [6, 8], 'color': "lightgreen"},
-                            {'range': [8, 14], 'color': "lightcoral"}
-                        ],
-                        'threshold': {
-                            'line': {'color': "red", 'width': 4},
-                            'thickness': 0.75,
-                            'value': 7
-                        }
-                    }
-                ))
-                
-                st.markdown("---")
-                col1, col2 = st.columns([1, 2])
-                
-                with col1:
-                    st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Soil parameters summary
-                    st.markdown("#### Test Parameters")
-                    st.info(f"**pH Level:** {ph_level}")
-                    st.info(f"**Organic Matter:** {organic_matter}")
-                    st.info(f"**Drainage:** {drainage}")
-                
-                with col2:
-                    st.markdown(f"### Soil Type: **{analysis.soil_type}**")
-                    st.markdown(f"**pH Analysis:** {analysis.ph_level}")
-                    
-                    st.markdown("#### Nutrient Status")
-                    for nutrient in analysis.nutrient_status:
-                        st.markdown(f"• {nutrient}")
-                    
-                    st.markdown("#### Improvement Recommendations")
-                    for idx, rec in enumerate(analysis.recommendations, 1):
-                        st.markdown(f"**{idx}.** {rec}")
-                
-                # Suitable crops section
-                st.markdown("---")
-                st.markdown("#### Recommended Crops for Your Soil")
-                
-                # Display crops in a nice grid
-                crops_per_row = 4
-                crop_rows = [analysis.suitable_crops[i:i + crops_per_row] 
-                           for i in range(0, len(analysis.suitable_crops), crops_per_row)]
-                
-                for row in crop_rows:
-                    cols = st.columns(len(row))
-                    for col, crop in zip(cols, row):
-                        with col:
-                            st.success(f"{crop}")
-                
-                # Download report
-                soil_report = f"""
+        _start_job("soil", ai_assistant.analyze_soil_conditions,
+                   ph_level, organic_matter, drainage, region)
+
+    job = _finished_job("soil", "AI is analyzing soil conditions...")
+    if job is None:
+        return
+    (ph_level, organic_matter, drainage, region), future, fresh = job
+    try:
+        analysis = future.result()
+        
+        # Store in session state
+        soil_data = {
+            'region': region,
+            'ph_level_input': ph_level,
+            'organic_matter': organic_matter,
+            'drainage': drainage,
+            'soil_type': analysis.soil_type,
+            'ph_analysis': analysis.ph_level,
+            'nutrient_status': analysis.nutrient_status,
+            'recommendations': analysis.recommendations,
+            'suitable_crops': analysis.suitable_crops
+        }
+        if fresh:
+            st.session_state.green_cure_manager.add_soil_analysis(soil_data)
+        
+        # Display results
+        st.success("Soil Analysis Complete!")
+        
+        st.markdown("---")
+        col1, col2 = st.columns([1, 2])
+        
+        with col1:
+            st.plotly_chart(_ph_gauge(ph_level), use_container_width=True)
+            
+            # Soil parameters summary
+            st.subheader("Test Parameters")
+            st.info(f"**pH Level:** {ph_level}")
+            st.info(f"**Organic Matter:** {organic_matter}")
+            st.info(f"**Drainage:** {drainage}")
+        
+        with col2:
+            st.markdown(f"### Soil Type: **{analysis.soil_type}**")
+            st.markdown(f"**pH Analysis:** {analysis.ph_level}")
+            
+            st.subheader("Nutrient Status")
+            st.markdown("\n\n".join(f"• {nutrient}" for nutrient in analysis.nutrient_status))
+            
+            st.subheader("Improvement Recommendations")
+            st.markdown("\n\n".join(f"**{idx}.** {rec}" for idx, rec in enumerate(analysis.recommendations, 1)))
+        
+        # Suitable crops section
+        st.markdown("---")
+        st.subheader("Recommended Crops for Your Soil")
+        
+        # Display crops in a nice grid
+        for row in _chunks(analysis.suitable_crops, 4):
+            cols = st.columns(len(row))
+            for col, crop in zip(cols, row):
+                col.success(f"{crop}")
+        
+        # Download report
+        report_date, file_stamp = _report_stamps()
+        buf = io.StringIO()
+        w = buf.write
+        w(f"""
 GREEN CURE - SOIL ANALYSIS REPORT
 ===============================
 
@@ -708,38 +960,45 @@ Test Parameters:
 - Organic Matter: {organic_matter}
 - Drainage: {drainage}
 - Region: {region}
-- Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+- Date: {report_date}
 
 ANALYSIS RESULTS:
 Soil Type: {analysis.soil_type}
 pH Analysis: {analysis.ph_level}
 
 NUTRIENT STATUS:
-{chr(10).join([f"• {nutrient}" for nutrient in analysis.nutrient_status])}
-
+""")
+        for nutrient in analysis.nutrient_status:
+            w(f"• {nutrient}\n")
+        w("""
 IMPROVEMENT RECOMMENDATIONS:
-{chr(10).join([f"{i+1}. {rec}" for i, rec in enumerate(analysis.recommendations)])}
-
+""")
+        for i, rec in enumerate(analysis.recommendations, 1):
+            w(f"{i}. {rec}\n")
+        w("""
 SUITABLE CROPS:
-{chr(10).join([f"• {crop}" for crop in analysis.suitable_crops])}
-
+""")
+        for crop in analysis.suitable_crops:
+            w(f"• {crop}\n")
+        w("""
 Generated by Green Cure AI Assistant
-                """
-                
-                st.download_button(
-                    "Download Soil Report",
-                    data=soil_report,
-                    file_name=f"soil_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-                
-            except Exception as e:
-                st.error(f"Error in soil analysis: {str(e)}")
-                st.info("Try different parameters or check your connection")
+        """)
+        soil_report = buf.getvalue()
+        
+        st.download_button(
+            "Download Soil Report",
+            data=soil_report,
+            file_name=f"soil_analysis_{file_stamp}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+        
+    except Exception as e:
+        st.error(f"Error in soil analysis: {str(e)}")
+        st.info("Try different parameters or check your connection")
 
 def display_weather_advisory(ai_assistant):
-    st.markdown('<h1 class="main-header">Weather-Based Farming Advisory</h1>', unsafe_allow_html=True)
+    st.header("Weather-Based Farming Advisory")
     st.markdown("Get real-time weather-based farming recommendations and alerts")
     
     with st.form("weather_advisory_form"):
@@ -756,11 +1015,7 @@ def display_weather_advisory(ai_assistant):
             )
         
         with col2:
-            crop_stage = st.selectbox("Current Crop Stage", [
-                "Land Preparation", "Sowing/Planting", "Germination", 
-                "Vegetative Growth", "Flowering/Pollination", 
-                "Fruit Development", "Maturity", "Harvesting"
-            ])
+            crop_stage = st.selectbox("Current Crop Stage", _CROP_STAGES)
         
         # Only form submit button inside form    
         submitted = st.form_submit_button("Get Weather Advisory", type="primary", use_container_width=True)
@@ -771,94 +1026,78 @@ def display_weather_advisory(ai_assistant):
             st.error("Please fill in all required fields")
             return
             
-        with st.spinner("AI is generating weather advisory..."):
-            try:
-                advisory = ai_assistant.get_weather_advisory(
-                    location, current_weather, crop_stage
-                )
-                
-                # Store in session state
-                weather_data = {
-                    'location': location,
-                    'current_weather': current_weather,
-                    'crop_stage': crop_stage,
-                    'conditions': advisory.current_conditions,
-                    'farming_impact': advisory.farming_impact,
-                    'recommendations': advisory.recommendations,
-                    'alerts': advisory.alerts
-                }
-                st.session_state.green_cure_manager.add_weather_advisory(weather_data)
-                
-                # Display results
-                st.success("Weather Advisory Generated!")
-                
-                st.markdown("---")
-                
-                # Current conditions
-                st.markdown("### Current Weather Conditions")
-                st.info(advisory.current_conditions)
-                
-                # Farming impact
-                st.markdown("### Impact on Farming Activities")
-                st.warning(advisory.farming_impact)
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.markdown("### Immediate Recommendations")
-                    for idx, rec in enumerate(advisory.recommendations, 1):
-                        st.markdown(f"**{idx}.** {rec}")
-                
-                with col2:
-                    st.markdown("### Important Alerts")
-                    if advisory.alerts:
-                        for alert in advisory.alerts:
-                            st.error(f"{alert}")
-                    else:
-                        st.success("No critical alerts at this time")
-                
-                # Download report
-                weather_report = f"""
-GREEN CURE - WEATHER ADVISORY REPORT
-==================================
-
-Location: {location}
-Crop Stage: {crop_stage}
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-CURRENT WEATHER:
-{current_weather}
-
-WEATHER CONDITIONS ANALYSIS:
-{advisory.current_conditions}
+        _start_job("weather", ai_assistant.get_weather_advisory,
+                   location, current_weather, crop_stage)
 
-FARMING IMPACT:
-{advisory.farming_impact}
-
-IMMEDIATE RECOMMENDATIONS:
-{chr(10).join([f"{i+1}. {rec}" for i, rec in enumerate(advisory.recommendations)])}
-
-ALERTS:
-{chr(10).join([f"• {alert}" for alert in advisory.alerts]) if advisory.alerts else "No critical alerts"}
-
-Generated by Green Cure AI Assistant
-                """
-                
-                st.download_button(
-                    "Download Weather Report",
-                    data=weather_report,
-                    file_name=f"weather_advisory_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain",
-                    use_container_width=True
-                )
-                
-            except Exception as e:
-                st.error(f"Error generating weather advisory: {str(e)}")
-                st.info("Try providing more specific weather details")
+    job = _finished_job("weather", "AI is generating weather advisory...")
+    if job is None:
+        return
+    (location, current_weather, crop_stage), future, fresh = job
+    try:
+        advisory = future.result()
+        
+        # Store in session state
+        if fresh:
+            st.session_state.green_cure_manager.add_weather_advisory(
+                location, current_weather, crop_stage, advisory
+            )
+        
+        # Display results
+        st.success("Weather Advisory Generated!")
+        
+        st.markdown("---")
+        
+        # Current conditions
+        st.subheader("Current Weather Conditions")
+        st.info(advisory.current_conditions)
+        
+        # Farming impact
+        st.subheader("Impact on Farming Activities")
+        st.warning(advisory.farming_impact)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Immediate Recommendations")
+            st.markdown("\n\n".join(f"**{idx}.** {rec}" for idx, rec in enumerate(advisory.recommendations, 1)))
+        
+        with col2:
+            st.subheader("Important Alerts")
+            if advisory.alerts:
+                st.error("\n\n".join(advisory.alerts))
+            else:
+                st.success("No critical alerts at this time")
+        
+        # Download report
+        report_date, file_stamp = _report_stamps()
+        recommendations = "\n".join(f"{i}. {rec}" for i, rec in enumerate(advisory.recommendations, 1))
+        alerts = "\n".join(f"• {alert}" for alert in advisory.alerts) or "No critical alerts"
+        weather_report = _WEATHER_REPORT_TEMPLATE.format_map({
+            'location': location,
+            'crop_stage': crop_stage,
+            'report_date': report_date,
+            'current_weather': current_weather,
+            'conditions': advisory.current_conditions,
+            'farming_impact': advisory.farming_impact,
+            'recommendations': recommendations,
+            'alerts': alerts
+        })
+        
+        st.download_button(
+            "Download Weather Report",
+            data=weather_report,
+            file_name=f"weather_advisory_{file_stamp}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+        
+    except Exception as e:
+        st.error(f"Error generating weather advisory: {str(e)}")
+        st.info("Try providing more specific weather details")
 
 def display_market_analysis(ai_assistant):
     # st.title("Market Intelligence & Analysis")
-    st.markdown('<h1 class="main-header">Market Intelligence & Analysis</h1>', unsafe_allow_html=True)
+    st.header("Market Intelligence & Analysis")
     st.markdown("Get market insights, pricing trends, and profit optimization strategies")
     
     with st.form("market_analysis_form"):
@@ -867,46 +1106,32 @@ def display_market_analysis(ai_assistant):
         col1, col2 = st.columns(2)
         
         with col1:
-            crop_type = st.selectbox("Crop Type", [
-                "Wheat", "Rice", "Cotton", "Sugarcane", "Soybean",
-                "Maize", "Bajra", "Jowar", "Potato", "Tomato", 
-                "Onion", "Garlic", "Chilli", "Groundnut", "Other"
-            ])
+            crop_type = st.selectbox("Crop Type", _MARKET_CROP_TYPES)
             location = st.text_input("Market Location", placeholder="e.g., Guna Mandi, Madhya Pradesh")
         
         with col2:
-            quantity = st.selectbox("Expected Quantity", [
-                "Small (< 10 quintals)", "Medium (10-50 quintals)", 
-                "Large (50-200 quintals)", "Bulk (> 200 quintals)"
-            ])
+            quantity = st.selectbox("Expected Quantity", _QUANTITY_OPTIONS)
         
         # Only form submit button inside form
         submitted = st.form_submit_button("Get Market Analysis", type="primary", use_container_width=True)
     
     # Processing logic OUTSIDE the form
     if submitted:
-        if not crop_type or not location:
+        # The selectboxes always hold a value; only the free-text location can be blank
+        if not location.strip():
             st.error("Please fill in all required fields")
             return
             
         with st.spinner("AI is analyzing market conditions..."):
             try:
-                analysis = ai_assistant.get_market_analysis(
+                analysis = ai_assistant.analyze_market_conditions(
                     crop_type, location, quantity
                 )
                 
                 # Store in session state
-                market_data = {
-                    'crop_type': crop_type,
-                    'location': location,
-                    'quantity': quantity,
-                    'crop_prices': analysis.crop_prices,
-                    'demand_forecast': analysis.demand_forecast,
-                    'best_selling_time': analysis.best_selling_time,
-                    'market_trends': analysis.market_trends,
-                    'profit_tips': analysis.profit_tips
-                }
-                st.session_state.green_cure_manager.add_market_analysis(market_data)
+                st.session_state.green_cure_manager.add_market_analysis(
+                    crop_type, location, quantity, analysis
+                )
                 
                 # Display results
                 st.success("Market Analysis Complete!")
@@ -919,57 +1144,37 @@ def display_market_analysis(ai_assistant):
                 col1, col2 = st.columns(2)
                 
                 with col1:
-                    st.markdown("#### Current Pricing Information")
-                    for price_info in analysis.crop_prices:
-                        st.info(f"{price_info}")
-                    
-                    st.markdown("#### Best Selling Time")
-                    st.success(f"{analysis.best_selling_time}")
+                    st.subheader("Current Pricing Information")
+                    st.info(analysis.current_price)
                     
-                    st.markdown("#### Market Trends")
-                    for trend in analysis.market_trends:
-                        st.markdown(f"{trend}")
+                    st.subheader("Price Trend")
+                    st.markdown(analysis.price_trend)
                 
                 with col2:
-                    st.markdown("#### Demand Forecast")
-                    st.warning(f"{analysis.demand_forecast}")
+                    st.subheader("Demand Status")
+                    st.warning(analysis.demand_status)
                     
-                    st.markdown("#### Profit Optimization Tips")
-                    for idx, tip in enumerate(analysis.profit_tips, 1):
-                        st.markdown(f"**{idx}.** {tip}")
+                    st.subheader("Selling Tips")
+                    st.markdown("\n\n".join(f"**{idx}.** {tip}" for idx, tip in enumerate(analysis.selling_tips, 1)))
                 
                 # Download report
-                market_report = f"""
-GREEN CURE - MARKET ANALYSIS REPORT
-=================================
-
-Crop: {crop_type}
-Location: {location}
-Quantity: {quantity}
-Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-CURRENT PRICING:
-{chr(10).join([f"• {price}" for price in analysis.crop_prices])}
-
-DEMAND FORECAST:
-{analysis.demand_forecast}
-
-BEST SELLING TIME:
-{analysis.best_selling_time}
-
-MARKET TRENDS:
-{chr(10).join([f"• {trend}" for trend in analysis.market_trends])}
-
-PROFIT OPTIMIZATION TIPS:
-{chr(10).join([f"{i+1}. {tip}" for i, tip in enumerate(analysis.profit_tips)])}
-
-Generated by Green Cure AI Assistant
-                """
+                report_date, file_stamp = _report_stamps()
+                tips = "\n".join(f"{i}. {tip}" for i, tip in enumerate(analysis.selling_tips, 1))
+                market_report = _MARKET_REPORT_TEMPLATE.format_map({
+                    'crop_type': crop_type,
+                    'location': location,
+                    'quantity': quantity,
+                    'report_date': report_date,
+                    'current_price': analysis.current_price,
+                    'demand_status': analysis.demand_status,
+                    'price_trend': analysis.price_trend,
+                    'tips': tips
+                })
                 
                 st.download_button(
                     "Download Market Report",
                     data=market_report,
-                    file_name=f"market_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    file_name=f"market_analysis_{file_stamp}.txt",
                     mime="text/plain",
                     use_container_width=True
                 )
@@ -978,14 +1183,51 @@ Generated by Green Cure AI Assistant
                 st.error(f"Error in market analysis: {str(e)}")
                 st.info("Try different crop or location details")
 
+# Sample data for demonstration
+_SAMPLE_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun')
+_SAMPLE_YIELD = (120, 140, 160, 180, 200, 220)
+_SAMPLE_REVENUE = (50000, 60000, 70000, 80000, 90000, 100000)
+_SERVICES = ('Crop Recommendations', 'Disease Diagnosis', 'Soil Analysis', 'Weather Advisory', 'Market Analysis')
+_METRIC_NAMES = ('Total AI Consultations', 'Success Rate', 'Average Response Time', 'User Satisfaction')
+_METRIC_VALUES = ('95%', '2.3 seconds', '4.8/5.0')
+_METRIC_STATUS = ('📈 Excellent', '✅ High', '⚡ Fast', '😊 Great')
+
+@st.cache_data(show_spinner=False)
+def _yield_fig():
+    """Crop yield chart; its inputs are constant, so it is built once"""
+    import plotly.express as px
+    fig = px.line(x=list(_SAMPLE_MONTHS), y=list(_SAMPLE_YIELD), title="Expected Crop Yield Trend (Quintals)")
+    fig.update_traces(line_color='green', line_width=3)
+    fig.update_layout(xaxis_title="Month", yaxis_title="Yield (Quintals)")
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _revenue_fig():
+    """Revenue chart; its inputs are constant, so it is built once"""
+    import plotly.express as px
+    fig = px.bar(x=list(_SAMPLE_MONTHS), y=list(_SAMPLE_REVENUE), title="Projected Monthly Revenue (₹)")
+    fig.update_traces(marker_color='lightgreen')
+    fig.update_layout(xaxis_title="Month", yaxis_title="Revenue (₹)")
+    return fig
+
+@st.cache_data(show_spinner=False)
+def _usage_pie(usage_counts):
+    """Service usage pie, built once per distinct tuple of counts"""
+    import pandas as pd
+    import plotly.express as px
+    usage_df = pd.DataFrame({'Service': _SERVICES, 'Usage Count': usage_counts})
+    return px.pie(usage_df, values='Usage Count', names='Service', 
+                  title="Green Cure Service Usage Distribution")
+
 def display_farm_analytics():
-    st.markdown('<h1 class="main-header">Farm Analytics & Insights</h1>', unsafe_allow_html=True)
+    st.header("Farm Analytics & Insights")
     st.markdown("Comprehensive analytics and performance insights for your agricultural operations")
     
-    # Sample data for demonstration
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
-    crop_yield = [120, 140, 160, 180, 200, 220]
-    revenue = [50000, 60000, 70000, 80000, 90000, 100000]
+    counts = st.session_state.green_cure_manager.counts
+    rec_n, diag_n, soil_n, wx_n, mkt_n = (
+        counts['rec'], counts['diag'], counts['soil'], counts['weather'], counts['market']
+    )
+    total_n = rec_n + diag_n + soil_n + wx_n + mkt_n
     
     # Performance metrics
     st.subheader("Performance Overview")
@@ -993,13 +1235,13 @@ def display_farm_analytics():
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Recommendations", len(st.session_state.green_cure_manager.recommendations), "📈")
+        st.metric("Total Recommendations", rec_n, "📈")
     with col2:
-        st.metric("Disease Diagnoses", len(st.session_state.green_cure_manager.diagnoses), "🔬")
+        st.metric("Disease Diagnoses", diag_n, "🔬")
     with col3:
-        st.metric("Soil Analyses", len(st.session_state.green_cure_manager.soil_analyses), "🌍")
+        st.metric("Soil Analyses", soil_n, "🌍")
     with col4:
-        st.metric("Weather Advisories", len(st.session_state.green_cure_manager.weather_advisories), "🌤️")
+        st.metric("Weather Advisories", wx_n, "🌤️")
     
     st.markdown("---")
     
@@ -1007,76 +1249,72 @@ def display_farm_analytics():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Crop yield chart
-        fig1 = px.line(x=months, y=crop_yield, title="Expected Crop Yield Trend (Quintals)")
-        fig1.update_traces(line_color='green', line_width=3)
-        fig1.update_layout(xaxis_title="Month", yaxis_title="Yield (Quintals)")
-        st.plotly_chart(fig1, use_container_width=True)
+        st.plotly_chart(_yield_fig(), use_container_width=True)
     
     with col2:
-        # Revenue chart
-        fig2 = px.bar(x=months, y=revenue, title="Projected Monthly Revenue (₹)")
-        fig2.update_traces(marker_color='lightgreen')
-        fig2.update_layout(xaxis_title="Month", yaxis_title="Revenue (₹)")
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(_revenue_fig(), use_container_width=True)
     
     # Service usage analytics
     st.subheader("Service Usage Analytics")
     
-    usage_data = {
-        'Service': ['Crop Recommendations', 'Disease Diagnosis', 'Soil Analysis', 'Weather Advisory', 'Market Analysis'],
-        'Usage Count': [
-            len(st.session_state.green_cure_manager.recommendations),
-            len(st.session_state.green_cure_manager.diagnoses),
-            len(st.session_state.green_cure_manager.soil_analyses),
-            len(st.session_state.green_cure_manager.weather_advisories),
-            len(st.session_state.green_cure_manager.market_analyses)
-        ]
-    }
-    
-    usage_df = pd.DataFrame(usage_data)
-    
-    if sum(usage_data['Usage Count']) > 0:
-        fig3 = px.pie(usage_df, values='Usage Count', names='Service', 
-                      title="Green Cure Service Usage Distribution")
-        st.plotly_chart(fig3, use_container_width=True)
-    else:
+    if total_n == 0:
         st.info("Start using Green Cure services to see analytics here!")
+        return
     
-    # Detailed metrics table
-    st.subheader("Detailed Metrics")
+    st.plotly_chart(_usage_pie((rec_n, diag_n, soil_n, wx_n, mkt_n)), use_container_width=True)
     
-    metrics_data = {
-        'Metric': ['Total AI Consultations', 'Success Rate', 'Average Response Time', 'User Satisfaction'],
-        'Value': [
-            sum(usage_data['Usage Count']),
-            '95%',
-            '2.3 seconds',
-            '4.8/5.0'
-        ],
-        'Status': ['📈 Excellent', '✅ High', '⚡ Fast', '😊 Great']
-    }
+    # Detailed metrics table; only the consultation total changes between runs
+    st.subheader("Detailed Metrics")
     
-    metrics_df = pd.DataFrame(metrics_data)
+    import pandas as pd
+    metrics_df = pd.DataFrame({
+        'Metric': _METRIC_NAMES,
+        'Value': (str(total_n), *_METRIC_VALUES),
+        'Status': _METRIC_STATUS
+    })
     st.dataframe(metrics_df, use_container_width=True)
 
+@st.cache_data(max_entries=8, show_spinner=False)
+def _report_bytes(report_path, mtime):
+    """Contents of a generated report; mtime is part of the key, so the file is re-read only when it changes"""
+    with open(report_path, "rb") as file:
+        return file.read()
+
+def _comprehensive_pdf(mgr):
+    """Return (bytes, file name) of the comprehensive PDF, rebuilt only when the histories changed
+
+    The running counts only grow, so they identify the manager state. The memo
+    lives in session state because each session has its own manager.
+    """
+    state_key = tuple(mgr.counts.values())
+    cached = st.session_state.get('pdf_report')
+    if cached is not None and cached[0] == state_key:
+        _, report_path, report_name = cached
+        try:
+            return _report_bytes(report_path, os.path.getmtime(report_path)), report_name
+        except OSError:
+            # The file was removed since it was built (e.g. results/ was cleaned); build it again
+            del st.session_state.pdf_report
+    report_path = mgr.generate_comprehensive_report()
+    if not report_path:
+        return None
+    report_name = os.path.basename(report_path)
+    st.session_state.pdf_report = (state_key, report_path, report_name)
+    return _report_bytes(report_path, os.path.getmtime(report_path)), report_name
+
 def display_reports():
     # st.title("Reports & Documentation")
-    st.markdown('<h1 class="main-header">Reports & Documentation</h1>', unsafe_allow_html=True)
+    st.header("Reports & Documentation")
     st.markdown("Generate and download comprehensive agricultural reports and documentation")
     
+    mgr = st.session_state.green_cure_manager
+    counts = mgr.counts
+    
     # Report generation options
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        report_type = st.selectbox("Select Report Type", [
-            "Comprehensive Farm Report",
-            "Crop Recommendations Summary", 
-            "Disease Diagnosis History",
-            "Soil Analysis Summary",
-            "Weather Advisory Log",
-            "Market Analysis Report"
-        ])
+        report_type = st.selectbox("Select Report Type", _REPORT_TYPES)
         
         date_range = st.date_input(
             "Select Date Range",
@@ -1085,92 +1323,103 @@ def display_reports():
         )
     
     with col2:
-        st.markdown("### Available Data")
-        st.info(f"Recommendations: {len(st.session_state.green_cure_manager.recommendations)}")
-        st.info(f"Diagnoses: {len(st.session_state.green_cure_manager.diagnoses)}")
-        st.info(f"Soil Analyses: {len(st.session_state.green_cure_manager.soil_analyses)}")
-        st.info(f"Weather Advisories: {len(st.session_state.green_cure_manager.weather_advisories)}")
+        st.subheader("Available Data")
+        st.info(
+            f"Recommendations: {counts['rec']}\n\n"
+            f"Diagnoses: {counts['diag']}\n\n"
+            f"Soil Analyses: {counts['soil']}\n\n"
+            f"Weather Advisories: {counts['weather']}"
+        )
     
     if st.button("Generate Report", type="primary", use_container_width=True):
         if report_type == "Comprehensive Farm Report":
             with st.spinner("Generating comprehensive report..."):
-                report_path = st.session_state.green_cure_manager.generate_comprehensive_report()
-                if report_path:
+                report = _comprehensive_pdf(mgr)
+                if report:
+                    pdf_bytes, pdf_name = report
                     st.success("Comprehensive report generated successfully!")
                     
-                    with open(report_path, "rb") as file:
-                        st.download_button(
-                            "Download PDF Report",
-                            data=file.read(),
-                            file_name=os.path.basename(report_path),
-                            mime="application/pdf"
-                        )
+                    st.download_button(
+                        "Download PDF Report",
+                        data=pdf_bytes,
+                        file_name=pdf_name,
+                        mime="application/pdf"
+                    )
         else:
             # Generate text-based reports for other types
             with st.spinner("Generating report..."):
-                report_content = generate_specific_report(report_type)
+                generated_on, file_stamp = _report_stamps()
+                report_content = generate_specific_report(report_type, generated_on)
                 
                 st.success("Report generated successfully!")
                 
-                # Display preview
-                st.subheader("Report Preview")
-                st.text_area("Report Content", report_content, height=400)
+                # Read-only preview, collapsed by default since reports grow with history;
+                # very long ones are cut short and the download keeps the full text
+                preview = report_content
+                if len(preview) > _PREVIEW_LIMIT:
+                    preview = preview[:_PREVIEW_LIMIT] + "\n... (truncated, download for full report)"
+                with st.expander("Report Preview", expanded=False):
+                    st.code(preview, language="text")
                 
                 # Download option
                 st.download_button(
                     "Download Report",
                     data=report_content,
-                    file_name=f"{report_type.lower().replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                    file_name=f"{report_type.lower().replace(' ', '_')}_{file_stamp}.txt",
                     mime="text/plain"
                 )
 
-def generate_specific_report(report_type):
+def _first_retained(total, retained):
+    """Number of the oldest entry a bounded history still holds, counting from 1"""
+    return total - retained + 1
+
+def generate_specific_report(report_type, timestamp=None):
     """Generate specific type of report based on user selection"""
     manager = st.session_state.green_cure_manager
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    if timestamp is None:
+        timestamp = _now_str()
     
     if report_type == "Crop Recommendations Summary":
-        content = f"""
-GREEN CURE - CROP RECOMMENDATIONS SUMMARY
-=======================================
-Generated on: {timestamp}
-
-Total Recommendations: {len(manager.recommendations)}
-
-"""
-        for i, rec in enumerate(manager.recommendations, 1):
-            content += f"""
+        total, recs = manager.snapshot('rec', manager.recommendations, (
+            'crop_name', 'location', 'season', 'expected_yield', 'timestamp'
+        ))
+        first = _first_retained(total, len(recs[0]))
+        parts = [_RECS_SUMMARY_HEADER.format_map({'timestamp': timestamp, 'total': total})]
+        if first > 1:
+            parts.append(_TRUNCATED_NOTE.format_map({'first': first, 'total': total}))
+        for i, (crop_name, location, season, expected_yield, created) in enumerate(zip(*recs), first):
+            parts.append(f"""
 Recommendation {i}:
-- Crop: {rec.get('crop_name', 'N/A')}
-- Location: {rec.get('location', 'N/A')}
-- Season: {rec.get('season', 'N/A')}
-- Expected Yield: {rec.get('expected_yield', 'N/A')}
-- Timestamp: {rec.get('timestamp', 'N/A')}
+- Crop: {crop_name}
+- Location: {location}
+- Season: {season}
+- Expected Yield: {expected_yield}
+- Timestamp: {created}
 {'-' * 50}
-"""
+""")
         
     elif report_type == "Disease Diagnosis History":
-        content = f"""
-GREEN CURE - DISEASE DIAGNOSIS HISTORY
-====================================
-Generated on: {timestamp}
-
-Total Diagnoses: {len(manager.diagnoses)}
-
-"""
-        for i, diag in enumerate(manager.diagnoses, 1):
-            content += f"""
+        total, diags = manager.snapshot('diag', manager.diagnoses, (
+            'disease_name', 'crop_type', 'severity', 'region', 'timestamp'
+        ))
+        first = _first_retained(total, len(diags[0]))
+        parts = [_DIAG_HISTORY_HEADER.format_map({'timestamp': timestamp, 'total': total})]
+        if first > 1:
+            parts.append(_TRUNCATED_NOTE.format_map({'first': first, 'total': total}))
+        for i, (disease_name, crop_type, severity, region, created) in enumerate(zip(*diags), first):
+            parts.append(f"""
 Diagnosis {i}:
-- Disease: {diag.get('disease_name', 'N/A')}
-- Crop: {diag.get('crop_type', 'N/A')}
-- Severity: {diag.get('severity', 'N/A')}
-- Region: {diag.get('region', 'N/A')}
-- Timestamp: {diag.get('timestamp', 'N/A')}
+- Disease: {disease_name}
+- Crop: {crop_type}
+- Severity: {severity}
+- Region: {region}
+- Timestamp: {created}
 {'-' * 50}
-"""
+""")
     
     else:
-        content = f"""
+        counts = manager.counts
+        parts = [f"""
 GREEN CURE - {report_type.upper()}
 {'=' * (len(report_type) + 15)}
 Generated on: {timestamp}
@@ -1179,14 +1428,15 @@ This report type is being developed.
 Please use the Comprehensive Farm Report for detailed information.
 
 Current Data Summary:
-- Crop Recommendations: {len(manager.recommendations)}
-- Disease Diagnoses: {len(manager.diagnoses)}
-- Soil Analyses: {len(manager.soil_analyses)}
-- Weather Advisories: {len(manager.weather_advisories)}
-- Market Analyses: {len(manager.market_analyses)}
-"""
+- Crop Recommendations: {counts['rec']}
+- Disease Diagnoses: {counts['diag']}
+- Soil Analyses: {counts['soil']}
+- Weather Advisories: {counts['weather']}
+- Market Analyses: {counts['market']}
+"""]
     
-    return content
+    # Joined once at the end; += on a growing str copies it for every record
+    return "".join(parts)
 
 if __name__ == "__main__":
     main()